@@ -1,96 +1,394 @@
 # app.py
+"""Command line for the futbin trade scraper.
+
+    python app.py top [margin|margin_pct|trend_pct|price] [-k N]   best flips from the cache
+    python app.py query "<expression or saved name>" [--squad NAME] [--save NAME]
+    python app.py squad [NAME|NUMBER]     fetch one squad (no name: list squads)
+    python app.py scan [--budget 5m] [--resume] [--concurrency N] [--workers N]
+    python app.py export players|sales|rollups [-o FILE] [--squad S] [--since T] [--platform P]
+    python app.py bench [-k NAME] [--save-baseline] [--threshold PCT]
+    python app.py stress [--processes N] [--merges M]   concurrent cache writers, fails on a lost entry
+    python app.py watch | tui | alerts | backtest ...
+    python app.py --metrics-port 9108 watch      Prometheus metrics (--metrics-file PATH without a port)
+    python app.py --profile runs/scan scan       cProfile + Perfetto timeline (see scraper/profiling.py)
+
+Cache-only commands never import Playwright, BeautifulSoup or Textual and
+nothing prompts, so every subcommand works from cron and scripts.
+"""
+import argparse
 import asyncio
 import sys
 import time
 from datetime import datetime, timedelta
-from scraper.cache_manager import load_cache, save_cache, is_fresh
-from scraper.futbin_scraper import fetch_squads, scrape_squad_players, fetch_player_stats
-from scraper.analyzer import print_top5
-from scraper.constants import SQUADS_URL, SQUAD_CACHE_FILE, PLAYER_STATS_FILE
+from scraper.cache_manager import CacheError, load_cache, merge_cache, stamp, is_fresh
+from scraper.analyzer import print_top5, print_leaderboard
+from scraper.leaderboard import Leaderboard, top_players
+from scraper.players import PlayerIndex
+from scraper.scheduler import is_due
+from scraper import metrics, spans
+from scraper.profiling import add_profile_args, profiled
+from scraper.utils import parse_duration, RANK_METRICS
+from scraper.constants import BROWSER_CONTEXTS, SQUADS_URL, SQUAD_CACHE_FILE, PLAYER_STATS_FILE
+
+def show_top(metric="margin", k=10):
+    """Best flips across every cached squad, straight from the cache (no browser)."""
+    board = Leaderboard.from_cache(load_cache(PLAYER_STATS_FILE))
+    print_leaderboard(board.top(metric, k), metric)
+
+def show_query(text_or_name, squad=None):
+    """Run a query expression or saved query name over the cache (or one squad's players)."""
+    from scraper.query import QueryError, run_query
+    players_cache = load_cache(PLAYER_STATS_FILE)
+    if squad:
+        index = PlayerIndex.from_cache(players_cache, load_cache(SQUAD_CACHE_FILE))
+        players_cache = {squad: index.in_squad(squad)}
+    try:
+        rows = run_query(text_or_name, players_cache)
+    except QueryError as e:
+        print(f"❌ Invalid query: {e}")
+        return
+    print_leaderboard(rows, f"query '{text_or_name}'" + (f" in {squad}" if squad else ""))
+
+def check_alerts():
+    """Evaluate the watchlist against every cached player once."""
+    from scraper.watchlist import Watchlist
+    players_cache = load_cache(PLAYER_STATS_FILE)
+    alerts = Watchlist.from_file().evaluate((s, p) for s, players in players_cache.items() for p in players)
+    print(f"🔔 {len(alerts)} new alert(s).")
 
-async def main():
+def print_run_summary(run_stats, players_cache, k=10):
+    """Fetch counts plus how fresh the top-K cards by margin are after the run."""
+    print(f"📊 Fetched {run_stats['fetched']} players ({run_stats['failed']} failed), "
+          f"{run_stats['not_due']} skipped as not yet due.")
+    now = datetime.now()
+    top = top_players(players_cache, "margin", k)
+    ages = [(now - datetime.fromisoformat(p["last_checked"])).total_seconds() / 60
+            for _, p in top if p.get("last_checked")]
+    overdue = sum(1 for _, p in top if is_due(p))
+    if ages:
+        print(f"🕒 Top {len(top)} by margin: avg age {sum(ages) / len(ages):.0f}m, "
+              f"oldest {max(ages):.0f}m, {overdue} overdue.")
+
+def print_budget_summary(scan, k=5):
+    """What a (possibly deadline-bounded) scan refreshed and what it left behind."""
+    print(f"✅ Refreshed {scan.refreshed} players, {len(scan.failed)} failed, "
+          f"{len(scan.cancelled)} cancelled at the deadline, {len(scan.skipped)} not started.")
+    if scan.refreshed:
+        print(f"♻️ {scan.unchanged} sales tables unchanged since the last fetch "
+              f"({scan.unchanged / scan.refreshed:.0%} of refreshes skipped parsing and stats).")
+    left = scan.cancelled + scan.skipped
+    if left:
+        print("⏭ Highest-value players not refreshed:")
+        for value, squad, pinfo in sorted(left, key=lambda job: job[0], reverse=True)[:k]:
+            print(f"   {pinfo['Player']} ({squad}) — value score {value:,.0f}")
+
+def add_scan_args(parser):
+    parser.add_argument("--workers", type=int, default=1, help="browser processes to shard players across")
+    parser.add_argument("--budget", type=parse_duration, default=None,
+                        help="stop starting pages when this runs out, e.g. 90s, 5m, 1h")
+    parser.add_argument("--concurrency", type=int, default=8, help="pages open at once (per worker with --workers)")
+    parser.add_argument("--contexts", type=int, default=BROWSER_CONTEXTS,
+                        help="isolated browser sessions pages are spread over (retired and replaced when blocked)")
+    parser.add_argument("--resume", action="store_true", help="continue the last interrupted scan")
+
+def run_sharded_scan(scan_args):
+    """scan_all across --workers processes, each with its own browser (see scraper/workers.py)."""
+    from scraper.watchlist import Watchlist
+    from scraper.workers import ShardedScan
     start_time = time.time()
-    cutoff_time = datetime.now() - timedelta(hours=24)
+    squads_cache = load_cache(SQUAD_CACHE_FILE)
+    if not squads_cache:
+        print("⚠️ No cached squads found. Run app.py once to fetch the squad list.")
+        return
+    index = PlayerIndex.from_cache(load_cache(PLAYER_STATS_FILE), squads_cache)
+    watchlist = Watchlist.from_file()
+    not_due = 0
 
-    scan_all = len(sys.argv) > 1 and sys.argv[1].strip().lower() == "scan_all"
-    if scan_all:
-        print("⚡ Running in scan_all mode (will attempt to update all squads).")
+    def player_filter(squad, pinfo):
+        nonlocal not_due
+        due = is_due(index.stats_for(pinfo))
+        not_due += not due
+        return due
 
+    print(f"⚡ Running scan_all across {scan_args.workers} worker processes.")
+    scan = ShardedScan(workers=scan_args.workers, concurrency=scan_args.concurrency, contexts=scan_args.contexts,
+                       on_result=lambda squad, p: watchlist.evaluate([(squad, p)]))
+    stats = scan.run(squads_cache, player_filter)
+    merge_cache(SQUAD_CACHE_FILE, {name: stamp(info) for name, info in load_cache(SQUAD_CACHE_FILE).items()
+                                   if name in squads_cache})
+    print("\n⚡ scan_all finished.")
+    print_run_summary({"fetched": stats["fetched"] + stats["failed"], "failed": stats["failed"], "not_due": not_due},
+                      load_cache(PLAYER_STATS_FILE))
+    elapsed = time.time() - start_time
+    print(f"\n⏱ Total execution time: {int(elapsed//60)}m {elapsed%60:.2f}s")
+
+async def scan_all_squads(context, squads_cache, watchlist, scan_args, start_time):
+    """Refresh due players in expected-value order, stopping at the --budget deadline.
+
+    The player cache is read only to plan the jobs (keeping just the due
+    players' entries, to spot unchanged sales tables); results stream back
+    to it in batches, so memory stays flat however many players are scanned.
+
+    Jobs are journaled (scraper/journal.py) so `scan --resume` continues an interrupted run.
+    """
+    from scraper.journal import ScanJournal
+    from scraper.rosters import refresh_rosters
+    from scraper.scan import DeadlineScan, known_tables, plan_jobs
+    deadline = start_time + scan_args.budget if scan_args.budget else None
+    monotonic_deadline = time.monotonic() + (deadline - time.time()) if deadline else None
+    journal = ScanJournal()
+    jobs, not_due = (journal.remaining(), 0) if scan_args.resume else ([], 0)
+    if jobs:
+        print(f"↩️ Resuming the last scan_all: {len(jobs)} of {sum(journal.counts().values())} jobs left.")
+        index = PlayerIndex.from_cache(load_cache(PLAYER_STATS_FILE), squads_cache)
+    else:
+        if scan_args.resume:
+            print("📭 Nothing left to resume — starting a new scan.")
+        missing = [name for name, info in squads_cache.items() if not info.get("players")]
+        await refresh_rosters(context, squads_cache, missing, scan_args.concurrency, deadline)
+        with spans.span("plan_jobs"):
+            index = PlayerIndex.from_cache(load_cache(PLAYER_STATS_FILE), squads_cache)
+            jobs, not_due = plan_jobs(squads_cache, index)
+            journal.start_run(jobs)
+        print(f"🔁 {len(jobs)} due players across {len(squads_cache)} squads ({not_due} not yet due).")
+
+    previous = known_tables(jobs, index)
+    del index
+    scan = DeadlineScan(context, monotonic_deadline, scan_args.concurrency,
+                        on_result=lambda squad, p: watchlist.evaluate([(squad, p)]), journal=journal,
+                        previous=previous)
+    try:
+        await scan.run(jobs)
+    finally:
+        journal.close()
+
+    unfinished = scan.unfinished_squads()
+    merge_cache(SQUAD_CACHE_FILE, {name: stamp(info) for name, info in squads_cache.items()
+                                   if info.get("players") and name not in unfinished})
+    print("\n⚡ scan_all finished.")
+    print_budget_summary(scan)
+    print_run_summary({"fetched": len(jobs) - len(scan.skipped) - len(scan.cancelled), "failed": len(scan.failed),
+                       "not_due": not_due}, load_cache(PLAYER_STATS_FILE))
+    elapsed = time.time() - start_time
+    print(f"\n⏱ Total execution time: {int(elapsed//60)}m {elapsed%60:.2f}s")
+    peak = metrics.peak_rss_bytes()
+    if peak:
+        print(f"🧠 Peak memory (RSS): {peak / 2**20:.0f} MB")
+
+async def run_scan(scan_args):
+    """`scan`: refresh due players across every squad (see scan_all_squads)."""
+    from playwright.async_api import async_playwright
+    from scraper.contexts import ContextPool
+    from scraper.rosters import discover_squads
+    from scraper.watchlist import Watchlist
+
+    start_time = time.time()
+    budget = f" with a {scan_args.budget:.0f}s budget" if scan_args.budget else ""
+    print(f"⚡ Running in scan_all mode (will attempt to update all squads{budget}).")
     squads_cache = load_cache(SQUAD_CACHE_FILE)
-    players_cache = load_cache(PLAYER_STATS_FILE)
+    watchlist = Watchlist.from_file()
 
     async with async_playwright() as p:
         browser = await p.firefox.launch(headless=True)
-        context = await browser.new_context()
-
-        # If no squads cached or scan_all requested -> fetch squads
-        if not squads_cache:
-            print("🔍 No cached squads found — fetching from Futbin...")
-            squads_cache = await fetch_squads(context, SQUADS_URL)
-            save_cache(SQUAD_CACHE_FILE, squads_cache)
-            print(f"✅ Found {len(squads_cache)} squads.")
-
-        # scan_all mode: update all squads (respecting cache freshness)
-        if scan_all:
-            for squad_name, squad_info in squads_cache.items():
-                print(f"\n🔁 Updating squad: {squad_name}")
-                if is_fresh(squad_info) and squad_name in players_cache:
-                    print(f"📂 Cached and fresh — skipping {squad_name}")
-                    continue
-
-                player_urls = await scrape_squad_players(context, squad_info["url"])
-                tasks = [fetch_player_stats(context, pinfo, cutoff_time) for pinfo in player_urls]
-                squad_players = [r for r in await asyncio.gather(*tasks) if r]
-
-                players_cache[squad_name] = squad_players
-                squad_info["last_checked"] = datetime.now().isoformat()
-                save_cache(PLAYER_STATS_FILE, players_cache)
-                save_cache(SQUAD_CACHE_FILE, squads_cache)
-                print(f"✅ Squad {squad_name} updated.")
-            await browser.close()
-            print("\n⚡ scan_all finished.")
-            elapsed = time.time() - start_time
-            print(f"\n⏱ Total execution time: {int(elapsed//60)}m {elapsed%60:.2f}s")
-            return
-
-        # Interactive mode
-        available = list(squads_cache.keys())
-        print("\nAvailable TOTW squads:")
-        for i, n in enumerate(available, 1):
-            print(f"{i}. {n}")
-        try:
-            choice = int(input("Enter the number of the squad to check: "))
-            selected = available[choice - 1]
-        except Exception:
-            print("Invalid selection. Exiting.")
-            await browser.close()
-            return
+        context = await ContextPool.create(browser, scan_args.contexts)
+        print("🔍 Checking Futbin for new squads...")
+        deadline = start_time + scan_args.budget if scan_args.budget else None
+        await discover_squads(context, squads_cache, concurrency=scan_args.concurrency, deadline=deadline)
+        await scan_all_squads(context, squads_cache, watchlist, scan_args, start_time)
+        await browser.close()
 
-        squad_info = squads_cache[selected]
-        if is_fresh(squad_info) and selected in players_cache:
-            print(f"📂 Using cached stats for {selected}")
-            squad_players = players_cache[selected]
-        else:
-            print(f"🔍 Scraping latest 24h prices for squad {selected}...")
-            player_urls = await scrape_squad_players(context, squad_info["url"])
-            tasks = [fetch_player_stats(context, pinfo, cutoff_time) for pinfo in player_urls]
-            squad_players = [r for r in await asyncio.gather(*tasks) if r]
-            [selected] = squad_players
-            squad_info["last_checked"] = datetime.now().isoformat()
-            save_cache(PLAYER_STATS_FILE, players_cache)
-            save_cache(SQUAD_CACHE_FILE, squads_cache)
+def pick_squad(squads_cache, choice):
+    """Squad name for a name or 1-based list number, None if nothing matches."""
+    if choice in squads_cache:
+        return choice
+    names = list(squads_cache)
+    if choice and choice.isdigit() and 1 <= int(choice) <= len(names):
+        return names[int(choice) - 1]
+    return None
 
-        await browser.close()
+def list_squads(squads_cache):
+    print("\nAvailable TOTW squads:")
+    for i, n in enumerate(squads_cache, 1):
+        print(f"{i}. {n}")
 
-    # Show top 5
-    show_top = input("Do you want to see the top 5 players by profit margin? (y/n): ").strip().lower()
-    if show_top == "y":
-        print_top5(squad_players)
+async def run_squad(choice):
+    """`squad NAME|NUMBER`: one squad's 24h stats (cached if fresh) and its top 5."""
+    start_time = time.time()
+    cutoff_time = datetime.now() - timedelta(hours=24)
+    squads_cache = load_cache(SQUAD_CACHE_FILE)
+    players = PlayerIndex.from_cache(load_cache(PLAYER_STATS_FILE), squads_cache)
+    selected = pick_squad(squads_cache, choice)
+    if squads_cache and selected is None:
+        if choice:
+            print(f"❌ No squad matches '{choice}'.")
+        list_squads(squads_cache)
+        return
+
+    squad_players = players.in_squad(selected) if selected else []
+    if squad_players and is_fresh(squads_cache[selected]):
+        print(f"📂 Using cached stats for {selected}")
+    else:
+        from playwright.async_api import async_playwright
+        from scraper.contexts import ContextPool
+        from scraper.futbin_scraper import fetch_squads, fetch_player_stats
+        from scraper.rosters import refresh_rosters, roster_due
+        from scraper.watchlist import Watchlist
 
+        async with async_playwright() as p:
+            browser = await p.firefox.launch(headless=True)
+            context = await ContextPool.create(browser)
+            if not squads_cache:
+                print("🔍 No cached squads found — fetching from Futbin...")
+                squads_cache = merge_cache(SQUAD_CACHE_FILE, await fetch_squads(context, SQUADS_URL))
+                selected = pick_squad(squads_cache, choice)
+                if selected is None:
+                    await browser.close()
+                    if choice:
+                        print(f"❌ No squad matches '{choice}'.")
+                    list_squads(squads_cache)
+                    return
+
+            print(f"🔍 Scraping latest 24h prices for squad {selected}...")
+            squad_info = squads_cache[selected]
+            if roster_due(squad_info):
+                await refresh_rosters(context, squads_cache, [selected])
+            player_urls = squad_info.get("players", [])
+            tasks = [fetch_player_stats(context, pinfo, cutoff_time, previous=players.stats_for(pinfo))
+                     for pinfo in player_urls]
+            squad_players = [r for r in await asyncio.gather(*tasks) if r]
+            merge_cache(PLAYER_STATS_FILE, {selected: squad_players})
+            merge_cache(SQUAD_CACHE_FILE, {selected: stamp(squad_info)})
+            Watchlist.from_file().evaluate((selected, p) for p in squad_players)
+            await browser.close()
+
+    print_top5(squad_players)
     elapsed = time.time() - start_time
     print(f"\n⏱ Total execution time: {int(elapsed//60)}m {elapsed%60:.2f}s")
 
+def interactive():
+    """Bare `python app.py` at a terminal: pick a squad by number, as before."""
+    squads_cache = load_cache(SQUAD_CACHE_FILE)
+    if not squads_cache:
+        asyncio.run(run_squad(None))  # fetches and lists the squads
+        squads_cache = load_cache(SQUAD_CACHE_FILE)
+    else:
+        list_squads(squads_cache)
+    choice = input("Enter the number of the squad to check: ").strip()
+    if pick_squad(squads_cache, choice) is None:
+        print("Invalid selection. Exiting.")
+        return
+    asyncio.run(run_squad(choice))
+
+def run_tui():
+    import gui
+    gui.main([])  # app.py's own --profile already covers the TUI
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="app.py", description="Futbin trade scraper. "
+                                     "Set FUTBIN_BASE_URL to run against a local fixture server.")
+    parser.add_argument("--timings", action="store_true", help="print per-stage latency percentiles at exit")
+    parser.add_argument("--timings-file", metavar="JSONL", help="also append every span and player outcome here")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics at http://127.0.0.1:PORT/metrics while running")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="rewrite Prometheus metrics to PATH every --metrics-interval seconds (and at exit)")
+    parser.add_argument("--metrics-interval", type=float, default=15, metavar="SECONDS")
+    add_profile_args(parser)
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    top = commands.add_parser("top", help="best flips across all cached squads (no browser)")
+    top.add_argument("metric", nargs="?", default="margin", choices=RANK_METRICS)
+    top.add_argument("k", nargs="?", type=int, default=10)
+    query = commands.add_parser("query", help="run or save a query over the cache (see scraper/query.py)")
+    query.add_argument("text", nargs="+", help="expression or saved query name")
+    query.add_argument("--squad", help="only this squad's players")
+    query.add_argument("--save", metavar="NAME", help="save the expression under NAME instead of running it")
+    squad = commands.add_parser("squad", help="fetch one squad by name or list number (no name: list squads)")
+    squad.add_argument("name", nargs="*")
+    scan = commands.add_parser("scan", aliases=["scan_all"], help="refresh due players across every squad")
+    add_scan_args(scan)
+    commands.add_parser("tui", help="open the Textual interface")
+    commands.add_parser("alerts", help="evaluate the watchlist against the cache once")
+    # Options after these are passed through to scraper/watch.py, backtest.py, export.py, bench.py and stress.py
+    commands.add_parser("watch", help="keep cached stats fresh until stopped (SIGHUP reloads)", add_help=False)
+    commands.add_parser("backtest", help="replay stored sales against the buy/sell strategy", add_help=False)
+    commands.add_parser("export", help="stream players, sales or rollups to csv/jsonl/parquet", add_help=False)
+    commands.add_parser("bench", help="microbenchmarks with a saved baseline and regression threshold", add_help=False)
+    commands.add_parser("stress", help="many processes merging into one cache; fails if an entry is lost", add_help=False)
+
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command not in ("watch", "backtest", "export", "bench", "stress"):
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.timings or args.timings_file:
+        spans.enable(args.timings_file)
+    server = None
+    if args.metrics_port is not None:
+        try:
+            server = metrics.serve(args.metrics_port)
+        except OSError as e:
+            # Usually the port is taken (another watch/scan already serving)
+            if not args.metrics_file:
+                parser.error(f"cannot serve metrics on port {args.metrics_port}: {e.strerror or e} "
+                             "(choose another --metrics-port or use --metrics-file)")
+            print(f"⚠️ Cannot serve metrics on port {args.metrics_port} ({e.strerror or e}); "
+                  f"writing them to {args.metrics_file} only")
+    stop_metrics_file = metrics.write_periodically(args.metrics_file, args.metrics_interval) if args.metrics_file else None
+    try:
+        with profiled(args.profile, args.profile_memory):
+            run_command(parser, args, extra)
+    except CacheError as e:
+        print(f"❌ {e} (restore it or move it aside; nothing was written)", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        spans.report()
+        spans.close()
+        if stop_metrics_file:
+            stop_metrics_file()
+        if server:
+            server.shutdown()
+
+def run_command(parser, args, extra):
+    if args.command == "top":
+        show_top(args.metric, args.k)
+    elif args.command == "query":
+        if args.save:
+            from scraper.query import save_query
+            save_query(args.save, " ".join(args.text))
+            print(f"💾 Saved query '{args.save}'")
+        else:
+            show_query(" ".join(args.text), args.squad)
+    elif args.command == "squad":
+        asyncio.run(run_squad(" ".join(args.name) or None))
+    elif args.command in ("scan", "scan_all"):
+        if (args.budget or args.resume) and args.workers > 1:
+            parser.error("--budget and --resume are not supported with --workers")
+        if args.workers > 1:
+            run_sharded_scan(args)
+        else:
+            asyncio.run(run_scan(args))
+    elif args.command == "tui":
+        run_tui()
+    elif args.command == "alerts":
+        check_alerts()
+    elif args.command == "watch":
+        from scraper.watch import main as watch
+        watch(extra)
+    elif args.command == "backtest":
+        from scraper.backtest import main as backtest
+        backtest(extra)
+    elif args.command == "export":
+        from scraper.export import main as export
+        export(extra)
+    elif args.command == "bench":
+        from scraper.bench import main as bench
+        bench(extra)
+    elif args.command == "stress":
+        from scraper.stress import main as stress
+        stress(extra)
+    elif sys.stdin.isatty():
+        interactive()
+    else:
+        parser.print_help()
+
 if __name__ == "__main__":
-    # import here to avoid top-level playwright import in module (keeps package import clean)
-    from playwright.async_api import async_playwright
-    asyncio.run(main())
\ No newline at end of file
+    main()
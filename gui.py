@@ -1,17 +1,95 @@
+import argparse
 import asyncio
+import heapq
 import sys
 import time
 from datetime import datetime, timedelta
-from scraper.cache_manager import load_cache, save_cache, is_recent
+from functools import total_ordering
+from scraper.cache_manager import load_cache, merge_cache, is_recent, player_key
 from scraper.constants import SQUAD_CACHE_FILE, SQUAD_EXPIRY_MINUTES, SQUADS_URL, PLAYER_STATS_FILE
 from scraper.analyzer import print_top5
-from scraper.futbin_scraper import fetch_player_stats, fetch_squads, scrape_squad_players, fetch_player_stats_test
-from scraper.utils import format_mk, parse_numeric_price, format_top5_by_profit
+from scraper.futbin_scraper import fetch_player_stats, fetch_player_stats_test
+from scraper.utils import format_mk, parse_numeric_price, format_top5_by_profit, player_metrics, RANK_METRICS
+from scraper.leaderboard import Leaderboard
+from scraper.players import PlayerIndex, roster_key
+from scraper.profiling import add_profile_args, profiled
+from scraper.contexts import ContextPool
+from scraper.query import PlayerTable, QueryError, resolve_query
+from scraper.rosters import discover_squads, refresh_rosters, roster_due
+from scraper.scan import DeadlineScan, known_tables, plan_jobs
+from scraper.watchlist import Watchlist, StdoutSink
 
 from textual.app import App, ComposeResult
 from textual.screen import Screen
-from textual.widgets import Button, Static, Header, Footer, DataTable, Input, ListView, ListItem
+from textual.widgets import Button, Static, Header, Footer, DataTable, Input, ListView, ListItem, ProgressBar
 from textual.containers import Horizontal, Vertical
+from rich.text import Text
+
+
+# Label and player_metrics() name of the numeric player table columns
+PLAYER_METRIC_COLUMNS = (
+    ("Price", "price"), ("Margin", "margin"), ("Margin %", "margin_pct"),
+    ("Trend %", "trend_pct"), ("Sales 24h", "sales_24h"), ("Volatility %", "volatility_pct"),
+)
+
+@total_ordering
+class NumberCell:
+    """DataTable cell holding a number: sorts by value (missing lowest), renders like the cache."""
+    def __init__(self, value, percent=False):
+        self.value = value
+        self.percent = percent
+
+    def _key(self):
+        return (self.value is not None, self.value or 0)
+
+    def __eq__(self, other):
+        return isinstance(other, NumberCell) and self._key() == other._key()
+
+    def __lt__(self, other):
+        return self._key() < other._key()
+
+    def __rich__(self):
+        if self.value is None:
+            text = "N/A"
+        elif self.percent:
+            text = f"{self.value:.2f}%"
+        else:
+            text = ("-" if self.value < 0 else "") + (format_mk(abs(self.value)) or "0")
+        return Text(text, justify="right")
+
+def metric_cells(player):
+    metrics = player_metrics(player) if player else {}
+    return [NumberCell(metrics.get(metric), metric.endswith("_pct")) for _, metric in PLAYER_METRIC_COLUMNS]
+
+class SortableTable(DataTable):
+    """DataTable sorted by clicking a header (again to reverse); keeps that order as rows change."""
+    sort_column, sort_reverse = None, False
+
+    def on_data_table_header_selected(self, event: DataTable.HeaderSelected) -> None:
+        self.sort_reverse = not self.sort_reverse if self.sort_column == event.column_key else True
+        self.sort_column = event.column_key
+        self.resort()
+
+    def resort(self):
+        if self.sort_column is not None:
+            self.sort(self.sort_column, reverse=self.sort_reverse)
+
+    def update_changed(self, row_key, cells):
+        """Update only the cells of `row_key` whose value differs ({column key: value})."""
+        for column, value in cells.items():
+            if self.get_cell(row_key, column) != value:
+                self.update_cell(row_key, column, value)
+
+def metric_cells_by_column(player):
+    return {metric: cell for (_, metric), cell in zip(PLAYER_METRIC_COLUMNS, metric_cells(player))}
+
+async def as_they_complete(tasks):
+    """Yield each task as soon as it finishes, cancelled ones included."""
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            yield task
 
 # -------------------------
 # Define Screens / Pages
@@ -25,6 +103,8 @@ class HomeScreen(Screen):
             yield Button("Promo players", id="promo")
             yield Button("Scan all (slow)", id="scan_all")
             yield Button("Squad", id="squad")
+            yield Button("Leaderboard", id="leaderboard")
+            yield Button("All players", id="players")
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "promo":
             self.app.push_screen("promo")
@@ -32,6 +112,10 @@ class HomeScreen(Screen):
             self.app.push_screen("scan_all")
         elif event.button.id == "squad":
             self.app.push_screen(Squad("hello World"))
+        elif event.button.id == "leaderboard":
+            self.app.push_screen("leaderboard")
+        elif event.button.id == "players":
+            self.app.push_screen("players")
 
 
 class PromoScreen(Screen):
@@ -50,27 +134,33 @@ class PromoScreen(Screen):
                        )
         yield Footer()
 
-    async def on_mount(self) -> None:
-        asyncio.create_task(self.load_data())
-    async def load_data(self) -> None:
-        # 1️⃣ Try load from cache (sync)
-        Squads = load_cache("data/squads.json")
-
+    def on_mount(self) -> None:
+        # Cached squads show at once; new promos and due rosters load in the background
+        Squads = load_cache(SQUAD_CACHE_FILE)
         if not Squads:
-            self.table.add_row("1", "📂 No cached squad files, loading squads from Futbin")
-            async with async_playwright() as p:
-                browser = await p.firefox.launch(headless=True)
-                context = await browser.new_context()
-
-                Squads = await fetch_squads(context, SQUADS_URL)
-                save_cache(SQUAD_CACHE_FILE, Squads)
-
-                await context.close()
+            self.table.add_row("", "📂 No cached squad files, loading squads from Futbin", key="loading")
+        self.show_squads(Squads)
+        self.app.run_worker(self.discover(Squads), name="discover_squads", group="discover_squads",
+                            exclusive=True, exit_on_error=False)
+
+    def show_squads(self, Squads) -> None:
+        if "loading" in self.table.rows and Squads:
+            self.table.remove_row("loading")
+        for e, name in enumerate(Squads, start=1):
+            if str(e) not in self.table.rows:
+                self.table.add_row(str(e), name, key=str(e))
+
+    async def discover(self, Squads) -> None:
+        async with async_playwright() as p:
+            browser = await p.firefox.launch(headless=True)
+            context = await ContextPool.create(browser, log=self.notify)
+            try:
+                new = await discover_squads(context, Squads, log=lambda message: None)
+            finally:
                 await browser.close()
-
-        self.table.clear()
-        for e, i in enumerate(Squads, start=1):
-            self.table.add_row(str(e), i, key=str(e))
+        self.show_squads(Squads)
+        if new:
+            self.notify(f"{len(new)} new squad(s): {', '.join(new)}")
 
 
     def on_input_submitted(self, event: Input.Submitted) -> None:
@@ -99,125 +189,430 @@ class PromoScreen(Screen):
             self.app.pop_screen()
 
 class Scan_allScreen(Screen):
-    """Settings page with back button."""
+    """scan_all in a background worker, with live throughput and pause/resume.
+
+    The worker belongs to the app, so the scan keeps going while other
+    screens are shown. Stats are polled twice a second and, like the
+    results table, only cells whose value changed are redrawn.
+    """
+
+    STATS = (("state", "State"), ("pages_sec", "Pages/sec"), ("queued", "Queue depth"),
+             ("inflight", "In flight"), ("refreshed", "Refreshed"), ("unchanged", "Unchanged"), ("failed", "Errors"),
+             ("elapsed", "Elapsed"))
+
+    def __init__(self, concurrency=4):
+        super().__init__()
+        self.concurrency = concurrency
+        self.scan = None
+        self.worker = None
+        self.state = "idle"
+        self.started = None
+        self.statsTable = SortableTable(show_cursor=False)
+        self.resultsTable = SortableTable(cursor_type="row")
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
-        yield Static("⚙️ Settings Page\n\n(Change preferences here)", id="title", classes="button")
-        yield Button("⬅ Back to Home", id="home", classes="button")
+        yield Static("⚡ Scan all squads (due players, most valuable first)", id="title")
+        self.pauseButton = Button("Pause", id="pause", disabled=True)
+        yield Vertical(
+            Horizontal(
+                Button("Start", id="start"),
+                self.pauseButton,
+                Button("Stop", id="stop"),
+                Button("⬅ Back to Home", id="home"),
+            ),
+            self.statsTable,
+            self.resultsTable,
+        )
         yield Footer()
 
+    def on_mount(self) -> None:
+        self.statsTable.add_column("Stat", key="stat")
+        self.statsTable.add_column("Value", key="value")
+        for key, label in self.STATS:
+            self.statsTable.add_row(label, "", key=key)
+        self.resultsTable.add_column("Player", key="player")
+        self.resultsTable.add_column("Squad", key="squad")
+        for label, metric in PLAYER_METRIC_COLUMNS:
+            self.resultsTable.add_column(label, key=metric)
+        self.set_interval(0.5, self.refresh_stats)
+
+    def refresh_stats(self) -> None:
+        if self.worker and self.worker.is_finished and not self.pauseButton.disabled:
+            if self.worker.is_cancelled:
+                self.state = "stopped"
+            elif self.worker.error:
+                self.state = f"failed: {self.worker.error}"
+            self.pauseButton.disabled = True
+            self.pauseButton.label = "Pause"
+        scan = self.scan
+        elapsed = time.time() - self.started if self.started else 0
+        values = {
+            "state": self.state,
+            "pages_sec": f"{scan.throughput():.2f}" if scan else "0.00",
+            "queued": str(len(scan.queued)) if scan else "0",
+            "inflight": str(len(scan.inflight)) if scan else "0",
+            "refreshed": str(scan.refreshed) if scan else "0",
+            "unchanged": f"{scan.unchanged} ({scan.unchanged / scan.refreshed:.0%})" if scan and scan.refreshed else "0",
+            "failed": str(len(scan.failed)) if scan else "0",
+            "elapsed": f"{int(elapsed // 60)}m {int(elapsed % 60)}s",
+        }
+        for key, value in values.items():
+            self.statsTable.update_changed(key, {"value": value})
+
+    def show_result(self, squad, player):
+        key = AllPlayersScreen.row_key(squad, player_key(player))
+        cells = metric_cells_by_column(player)
+        if key in self.resultsTable.rows:
+            self.resultsTable.update_changed(key, cells)
+        else:
+            self.resultsTable.add_row(player["player"], squad, *cells.values(), key=key)
+
+    def on_result(self, squad, player):
+        self.show_result(squad, player)
+        self.app.player_updated(squad, player)
+
+    async def run_scan(self) -> None:
+        self.started = time.time()
+        self.state = "loading rosters"
+        Squads = load_cache(SQUAD_CACHE_FILE)
+        async with async_playwright() as p:
+            browser = await p.firefox.launch(headless=True)
+            context = await ContextPool.create(browser, log=self.notify)
+            try:
+                missing = [name for name, info in Squads.items() if not info.get("players")]
+                await refresh_rosters(context, Squads, missing, self.concurrency, log=lambda message: None)
+                index = PlayerIndex.from_cache(load_cache(PLAYER_STATS_FILE), Squads)
+                jobs, not_due = plan_jobs(Squads, index)
+                self.state = f"scanning ({not_due} not due)"
+                self.scan = DeadlineScan(context, concurrency=self.concurrency, on_result=self.on_result,
+                                         previous=known_tables(jobs, index))
+                await self.scan.run(jobs)
+                self.state = "finished"
+            finally:
+                await browser.close()
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "home":
+            self.app.pop_screen()
+        elif event.button.id == "start":
+            if self.worker and self.worker.is_running:
+                self.notify("A scan is already running")
+                return
+            self.scan = None
+            self.worker = self.app.run_worker(self.run_scan(), name="scan_all", group="scan_all", exit_on_error=False)
+            self.pauseButton.disabled = False
+        elif event.button.id == "pause" and self.scan:
+            if self.scan.paused:
+                self.scan.resume()
+                self.state = "scanning"
+                self.pauseButton.label = "Pause"
+            else:
+                self.scan.pause()
+                self.state = "paused (finishing open pages)"
+                self.pauseButton.label = "Resume"
+        elif event.button.id == "stop" and self.worker:
+            self.worker.cancel()
+
+class LeaderboardScreen(Screen):
+    """Best flips across every cached squad, ranked by the selected metric.
+
+    Queries run over one PlayerTable, loaded from the cache on the first
+    query and kept current by `update_player`.
+    """
+
+    def __init__(self, metric="margin", k=20):
+        super().__init__()
+        self.metric = metric
+        self.k = k
+        self.table = DataTable()
+        self.players = None  # PlayerTable
+
+    def compose(self) -> ComposeResult:
+        yield Header(show_clock=True)
+        self.heading = Static("", id="title")
+        self.queryIn = Input(placeholder="Query or saved query name, e.g. price < 150k and margin_pct > 3 order by margin desc limit 10")
+        yield Vertical(
+            self.heading,
+            Horizontal(*[Button(metric, id=f"metric_{metric}") for metric in RANK_METRICS]),
+            self.queryIn,
+            self.table,
+            Button("Back to home", id="home"),
+        )
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.table.add_columns("#", "Player", "Squad", "Price", "Margin", "Margin %", "Trend %")
+        self.refresh_rows()
+
+    def on_screen_resume(self) -> None:
+        if self.is_mounted:
+            self.refresh_rows()
+
+    def update_player(self, squad, player):
+        if self.players is not None:
+            self.players.update(squad, player)
+
+    def refresh_rows(self) -> None:
+        self.heading.update(f"🏆 Top {self.k} players across all squads by {self.metric}")
+        self.show_rows(self.app.leaderboard.top(self.metric, self.k))
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        try:
+            query = resolve_query(event.value.strip())
+            if self.players is None:
+                self.players = PlayerTable(load_cache(PLAYER_STATS_FILE))
+            rows = query.run(self.players)
+        except QueryError as e:
+            self.heading.update(f"⚠️ {e}")
+            return
+        self.heading.update(f"🔎 {len(rows)} players for '{query.text}'")
+        self.show_rows(rows)
+
+    def show_rows(self, rows) -> None:
+        self.table.clear()
+        for idx, (squad, player) in enumerate(rows, 1):
+            stats = player["stats"]
+            self.table.add_row(
+                str(idx), player["player"], squad,
+                stats.get("trend_value") or "N/A", stats.get("profit_margin") or "N/A",
+                str(stats.get("profit_margin_pct", "N/A")), str(stats.get("trend_pct", "N/A")),
+            )
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "home":
             self.app.pop_screen()
+        elif event.button.id.startswith("metric_"):
+            self.metric = event.button.id[len("metric_"):]
+            self.refresh_rows()
 
 class Squad(Screen):
+    """One squad's players, streamed into a sortable table as each fetch completes."""
+
+    BINDINGS = [("x", "cancel_fetch", "Cancel fetch")]
+
     def __init__(self, data):
         super().__init__()
         self.data = data
-        self.Player_list = None
-        self.playerTable = ListView()
+        self.players = {}   # player key (futbin ID) -> latest cached/fetched entry
+        self.fetches = []
+        self.playerTable = SortableTable(cursor_type="row")
 
     def compose(self) -> ComposeResult:
-        Player = Static(self.data)
         self.status = Static("")
+        self.progress = ProgressBar(show_eta=False)
+        self.top5 = Static("")
         yield Header(show_clock=False)
         yield Vertical (
             Static(f"Top 5 most profitable players for {self.data}", id="title"),
                 self.status,
+                self.progress,
             Horizontal(
-                Button ("show players under 100k", id="affordable")
+                Button ("show players under 100k", id="affordable"),
+                Button ("cancel fetch", id="cancel"),
             ),
+            self.top5,
             self.playerTable
         )
+        yield Footer()
+
     async def on_mount(self):
+        self.playerTable.add_column("Player", key="player")
+        self.playerTable.add_column("Status", key="status")
+        for label, metric in PLAYER_METRIC_COLUMNS:
+            self.playerTable.add_column(label, key=metric)
         asyncio.create_task(self.load_data())
 
+    # ---------------- table ----------------
+    def show_player(self, key, name, player=None, status=""):
+        """Insert or update one player's row (keyed by futbin ID) in place."""
+        if player:
+            self.players[key] = player
+        cells = metric_cells(self.players.get(key))
+        if key not in self.playerTable.rows:
+            self.playerTable.add_row(name, status, *cells, key=key)
+            return
+        self.playerTable.update_changed(key, {"status": status, **metric_cells_by_column(self.players.get(key))})
+
+    def show_top5(self):
+        top = heapq.nlargest(5, self.players.values(), key=lambda p: player_metrics(p)["margin"] or float("-inf"))
+        self.top5.update("\n".join(
+            f"{idx}. ⚽ {p['player']} — 💸 {p['stats'].get('profit_margin', 'N/A')} "
+            f"({p['stats'].get('profit_margin_pct', 'N/A')}%) at 📈 {p['stats'].get('trend_value', 'N/A')}"
+            for idx, p in enumerate(top, 1)
+        ))
+
+    # ---------------- fetching ----------------
     async def load_data(self):
         Squads = load_cache(SQUAD_CACHE_FILE)
         players = load_cache(PLAYER_STATS_FILE)
-        selSquad = players[self.data]
-        chacheAge = Squads[self.data]["last_checked"]
-
+        if self.data not in Squads:
+            self.status.update(f"⚠️ {self.data} is not a cached squad")
+            self.progress.display = False
+            return
+        index = PlayerIndex.from_cache(players, Squads)
+        cached = index.in_squad(self.data)
+        for p in cached:
+            self.show_player(index.key_of(self.data, p), p["player"], p, "📂 cached")
+        self.show_top5()
+        chacheAge = Squads[self.data].get("last_checked")
+
+        if is_recent(chacheAge) and cached:
+            self.progress.display = False
+            return
+
+        self.status.update("Loading players from futbin...")
+        async with async_playwright() as p:
+            browser = await p.firefox.launch(headless=True)
+            context = await ContextPool.create(browser, log=self.notify)
+
+            if roster_due(Squads[self.data]):
+                await refresh_rosters(context, Squads, [self.data], log=self.status.update)
+            playerUrl = Squads[self.data].get("players", [])
+
+            self.progress.update(total=len(playerUrl), progress=0)
+            for pinfo in playerUrl:
+                self.show_player(roster_key(pinfo), pinfo["Player"], status="⏳ fetching")
+            cards = {}
+            for pinfo in playerUrl:
+                task = asyncio.create_task(fetch_player_stats_test(context, pinfo, self.data, Squads, players,
+                                                                   index.stats_for(pinfo)))
+                cards[task] = (roster_key(pinfo), pinfo["Player"])
+            self.fetches = list(cards)
+
+            counts = {"fetched": 0, "failed": 0, "cancelled": 0}
+            async for task in as_they_complete(self.fetches):
+                key, name = cards[task]
+                result = None if task.cancelled() or task.exception() else task.result()
+                if task.cancelled():
+                    counts["cancelled"] += 1
+                    self.show_player(key, name, status="⏹ cancelled")
+                elif result:
+                    counts["fetched"] += 1
+                    self.show_player(key, name, result, "✅ updated")
+                    self.app.player_updated(self.data, result)
+                    self.show_top5()
+                else:
+                    counts["failed"] += 1
+                    self.show_player(key, name, status="⚠️ failed")
+                self.progress.advance(1)
+                self.status.update(f"{counts['fetched']}/{len(playerUrl)} fetched, "
+                                   f"{counts['failed']} failed, {counts['cancelled']} cancelled")
+            self.fetches = []
+            await context.close()
+            await browser.close()
+
+    def action_cancel_fetch(self) -> None:
+        """Stop every outstanding player fetch; finished rows stay."""
+        for task in self.fetches:
+            task.cancel()
 
-        if is_recent(chacheAge) is False and self.data in players:
+    async def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "cancel":
+            self.action_cancel_fetch()
+        elif event.button.id == "affordable":
+            """under 100k price lookup"""
+            self.status.update("affordable")
+            index = PlayerIndex.from_cache(load_cache(PLAYER_STATS_FILE), load_cache(SQUAD_CACHE_FILE))
 
-            self.status.update("Loading players from futbin...")
-            async with async_playwright() as p:
-                browser = await p.firefox.launch(headless=True)
-                context = await browser.new_context()
+            # "affordable" saved query, see scraper/query.py
+            self.top5.update("".join(format_top5_by_profit(index.in_squad(self.data), True)))
 
-                playerUrl = None
 
-                if Squads[self.data]["url"] is None: 
-                    playerUrl = await scrape_squad_players(context,Squads[self.data]["url"])
-                    Squads[self.data]["players"] = playerUrl
-                    save_cache(SQUAD_CACHE_FILE, Squads)
-                else: 
-                    playerUrl = Squads[self.data]["players"]
-                    
-                self.status.update("fetching current prices for each player...")
-                fetchedStats = [fetch_player_stats_test(context, p, self.data, Squads, players) for p in playerUrl]
-                selSquad = [p for p in await asyncio.gather(*fetchedStats) if p]
+class AllPlayersScreen(Screen):
+    """Every cached player from every squad in one sortable, filterable table.
 
-        filtered = [p for p in selSquad if p.get("stats", {},).get("profit_margin")]
-        
-        playersSorted = sorted(
-            filtered,
-            key=lambda p: parse_numeric_price(p["stats"]["profit_margin"]),
-            reverse=True
-        )[:5]
+    DataTable only renders the rows in view, so thousands of rows scroll
+    smoothly. Typing filters by player or squad name; narrowing the filter
+    only re-checks the rows already shown. Fresh results update their row
+    in place through `update_player`.
+    """
 
-        for idx, player in enumerate(playersSorted, 1):
-            stats = player["stats"]
-            trend_pct = stats.get("trend_pct")
-            profit_pct = stats.get("profit_margin_pct")
-            trend_display = (
-                f"[green]🔺 {trend_pct}% [/green]"
-                if trend_pct and trend_pct > 0
-                else f"[red]🔻 {abs(trend_pct)}% [/red]"
-                if trend_pct
-                else "N/A"
-            )
-            profit_display = (
-                f"[green]🔺 {profit_pct}% [/green]"
-                if profit_pct and profit_pct > 0
-                else f"[red]🔻 {abs(profit_pct)}% [/red]"
-                if profit_pct
-                else "N/A"
-            )
+    def __init__(self):
+        super().__init__()
+        self.players = {}   # row key -> (squad, player)
+        self.filter_text = ""
+        self.table = SortableTable(cursor_type="row")
 
-            text = (
-                f"\n{idx}. ⚽ {player['player']}\n"
-                f"   📈 Trend Value       : {stats.get('trend_value', 'N/A')} | {trend_display}\n"
-                f"   💰 Avg Buy Now       : {stats.get('average_buy_now', 'N/A')}\n"
-                f"   🥇 Highest Price     : {stats.get('highest', 'N/A')}\n"
-                f"   🥉 Lowest Price      : {stats.get('lowest', 'N/A')}\n"
-                f"   ⬇️ Avg Below Trend   : {stats.get('avg_below_trend', 'N/A')}\n"
-                f"   ⬆️ Avg Above Trend   : {stats.get('avg_above_trend', 'N/A')}\n"
-                f"   💸 Profit Margin     : {stats.get('profit_margin', 'N/A')}\n"
-                f"   📊 Profit Margin %   : {profit_display}\n"
-            )
-            self.playerTable.append(Static(text))
-            self.status.update("")
+    def compose(self) -> ComposeResult:
+        yield Header(show_clock=True)
+        self.heading = Static("", id="title")
+        self.filterIn = Input(placeholder="Filter by player or squad name")
+        yield Vertical(self.heading, self.filterIn, self.table, Button("Back to home", id="home"))
+        yield Footer()
 
-    async def on_button_pressed(self, event: Button.Pressed) -> None:
-        if event.button.id == "affordable":
-            """under 100k price lookup"""
-            self.status.update("affordable")
-            playerStats = load_cache(PLAYER_STATS_FILE)
+    def on_mount(self) -> None:
+        self.table.add_column("Player", key="player")
+        self.table.add_column("Squad", key="squad")
+        for label, metric in PLAYER_METRIC_COLUMNS:
+            self.table.add_column(label, key=metric)
+        index = PlayerIndex.from_cache(load_cache(PLAYER_STATS_FILE), load_cache(SQUAD_CACHE_FILE))
+        for squad, key, player in index.items():
+            self.players[self.row_key(squad, key)] = (squad, player)
+        self.apply_filter("")
+
+    @staticmethod
+    def row_key(squad, key):
+        return f"{squad}\x1f{key}"
+
+    def matches(self, key, text):
+        squad, player = self.players[key]
+        return not text or text in player["player"].lower() or text in squad.lower()
+
+    def add_player_row(self, key):
+        squad, player = self.players[key]
+        self.table.add_row(player["player"], squad, *metric_cells(player), key=key)
+
+    def apply_filter(self, text):
+        text = text.strip().lower()
+        narrowing = self.filter_text in text and self.table.row_count
+        shown = {row_key.value for row_key in self.table.rows}
+        candidates = shown if narrowing else self.players.keys()
+        wanted = {key for key in candidates if self.matches(key, text)}
+        dropped = shown - wanted
+        if len(dropped) > len(wanted):
+            # remove_row is per-row work; re-adding the few survivors is cheaper
+            self.table.clear()
+            shown = set()
+        else:
+            for key in dropped:
+                self.table.remove_row(key)
+        for key in self.players:
+            if key in wanted and key not in shown:
+                self.add_player_row(key)
+        self.table.resort()
+        self.filter_text = text
+        self.heading.update(f"📋 {len(wanted)} of {len(self.players)} cached players")
+
+    def update_player(self, squad, player):
+        """Show a freshly fetched player: update its cells in place, or add it if new."""
+        key = self.row_key(squad, player_key(player))
+        is_new = key not in self.players
+        self.players[key] = (squad, player)
+        if not self.is_mounted:
+            return
+        if key in self.table.rows:
+            self.table.update_changed(key, metric_cells_by_column(player))
+        elif self.matches(key, self.filter_text):
+            self.add_player_row(key)
+            self.table.resort()
+        if is_new:
+            self.heading.update(f"📋 {self.table.row_count} of {len(self.players)} cached players")
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        self.apply_filter(event.value)
 
-            affordablePlayers = [
-                p for p in playerStats[self.data]
-                if  parse_numeric_price(p["stats"]["trend_value"]) < 100_000
-            ]
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "home":
+            self.app.pop_screen()
 
-            top5 = format_top5_by_profit(playerStats[self.data], True)
-            self.status.update("affordable")
-            self.playerTable.remove_children()
+class TuiAlertSink:
+    """Show watchlist alerts as Textual notifications."""
+    def __init__(self, app):
+        self.app = app
 
-            for p in format_top5_by_profit(playerStats[self.data], True):
-                self.playerTable.append(Static(p))
+    def send(self, alert):
+        self.app.notify(alert["message"], title="🔔 Watchlist", timeout=10)
 
 
 # -------------------------
@@ -248,14 +643,31 @@ class MultiScreenApp(App):
     """
 
     def on_mount(self) -> None:
+        # Ranking index over the whole cache, refreshed as players are re-fetched
+        self.leaderboard = Leaderboard.from_cache(load_cache(PLAYER_STATS_FILE))
+        # Printing would corrupt the screen, so stdout alerts become notifications
+        self.watchlist = Watchlist.from_file()
+        self.watchlist.sinks = [s for s in self.watchlist.sinks if not isinstance(s, StdoutSink)] + [TuiAlertSink(self)]
+
         # Register all screens
         self.install_screen(HomeScreen(), name="home")
         self.install_screen(PromoScreen, name="promo")
         self.install_screen(Scan_allScreen(), name="scan_all")
+        self.all_players = AllPlayersScreen()
+        self.install_screen(self.all_players, name="players")
+        self.leaderboard_screen = LeaderboardScreen()
+        self.install_screen(self.leaderboard_screen, name="leaderboard")
         
         # Start at the Home screen
         self.push_screen("home")
 
+    def player_updated(self, squad, player):
+        """Pass a freshly fetched player to the leaderboard, watchlist, query table and all-players table."""
+        self.leaderboard.update(squad, player)
+        self.leaderboard_screen.update_player(squad, player)
+        self.watchlist.evaluate([(squad, player)])
+        self.all_players.update_player(squad, player)
+
     def action_quit(self) -> None:
         """Quit the app cleanly."""
         self.exit()
@@ -265,6 +677,15 @@ class MultiScreenApp(App):
 # Run the App
 # -------------------------
 
-if __name__ == "__main__":
+def main(argv=None):
+    # Playwright is only needed once a screen fetches; keep it out of module import
+    global async_playwright
     from playwright.async_api import async_playwright
-    MultiScreenApp().run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(prog="gui.py", description="Textual interface for the futbin scraper.")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    with profiled(args.profile, args.profile_memory):
+        MultiScreenApp().run()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,6 +1,7 @@
-from .futbin_scraper import fetch_squads, fetch_player_stats
 from .cache_manager import load_cache, save_cache, is_fresh
-from .analyzer import print_top5
+from .analyzer import print_top5, print_leaderboard
+from .leaderboard import Leaderboard
+from .players import PlayerIndex, player_id
 from .utils import parse_numeric_price, format_mk
 from .constants import SQUADS_URL, PLAYER_STATS_FILE, SQUAD_CACHE_FILE, SQUAD_EXPIRY_MINUTES
 
@@ -11,10 +12,23 @@ __all__ = [
     "save_cache",
     "is_fresh",
     "print_top5",
+    "print_leaderboard",
+    "Leaderboard",
+    "PlayerIndex",
+    "player_id",
     "parse_numeric_price",
     "format_mk",
     "SQUADS_URL",
     "PLAYER_STATS_FILE",
     "SQUAD_CACHE_FILE",
     "SQUAD_EXPIRY_MINUTES",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    # The scraping functions pull in BeautifulSoup; import them on first use
+    # so cache-only commands (app.py top/query) start fast.
+    if name in ("fetch_squads", "fetch_player_stats"):
+        from . import futbin_scraper
+        return getattr(futbin_scraper, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
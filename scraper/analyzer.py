@@ -1,33 +1,37 @@
+import heapq
+from .utils import mk_to_int
+
 GREEN = "\033[92m"
 RED = "\033[91m"
 RESET = "\033[0m"
 
-def mk_to_int(s):
-    if not s: return 0
-    s = s.upper().replace(",","").strip()
-    if s.endswith("M"): return int(float(s[:-1])*1_000_000)
-    if s.endswith("K"): return int(float(s[:-1])*1000)
-    try: return int(s)
-    except: return 0
+def print_player(idx, player, squad=None):
+    stats = player["stats"]
+    trend_pct = stats.get("trend_pct")
+    trend_display = f"{GREEN}🔺 {trend_pct}%{RESET}" if trend_pct and trend_pct>0 else (f"{RED}🔻 {abs(trend_pct)}%{RESET}" if trend_pct else "N/A")
+    profit_pct = stats.get("profit_margin_pct")
+    profit_display = f"{GREEN}🔺 {profit_pct}%{RESET}" if profit_pct and profit_pct>0 else (f"{RED}🔻 {abs(profit_pct)}%{RESET}" if profit_pct else "N/A")
+
+    print(f"\n{idx}. ⚽ {player['player']}" + (f"  ({squad})" if squad else ""))
+    print(f"   📈 Trend Value       : {stats.get('trend_value','N/A')} | {trend_display}")
+    print(f"   💰 Avg Buy Now       : {stats.get('average_buy_now','N/A')}")
+    print(f"   🥇 Highest Price     : {stats.get('highest','N/A')}")
+    print(f"   🥉 Lowest Price      : {stats.get('lowest','N/A')}\n")
+    print(f"   ⬇️ Avg Below Trend   : {stats.get('avg_below_trend','N/A')}")
+    print(f"   ⬆️ Avg Above Trend   : {stats.get('avg_above_trend','N/A')}")
+    print(f"   💸 Profit Margin     : {stats.get('profit_margin','N/A')}")
+    print(f"   📊 Profit Margin %   : {profit_display}")
 
 def print_top5(players):
     filtered = [p for p in players if p.get("stats", {}).get("profit_margin")]
-    top5 = sorted(filtered, key=lambda p: mk_to_int(p["stats"]["profit_margin"]), reverse=True)[:5]
+    top5 = heapq.nlargest(5, filtered, key=lambda p: mk_to_int(p["stats"]["profit_margin"]))
 
     print("\n🏆 Top 5 Players by Profit Margin:")
     for idx, player in enumerate(top5,1):
-        stats = player["stats"]
-        trend_pct = stats.get("trend_pct")
-        trend_display = f"{GREEN}🔺 {trend_pct}%{RESET}" if trend_pct and trend_pct>0 else (f"{RED}🔻 {abs(trend_pct)}%{RESET}" if trend_pct else "N/A")
-        profit_pct = stats.get("profit_margin_pct")
-        profit_display = f"{GREEN}🔺 {profit_pct}%{RESET}" if profit_pct and profit_pct>0 else (f"{RED}🔻 {abs(profit_pct)}%{RESET}" if profit_pct else "N/A")
+        print_player(idx, player)
 
-        print(f"\n{idx}. ⚽ {player['player']}")
-        print(f"   📈 Trend Value       : {stats.get('trend_value','N/A')} | {trend_display}")
-        print(f"   💰 Avg Buy Now       : {stats.get('average_buy_now','N/A')}")
-        print(f"   🥇 Highest Price     : {stats.get('highest','N/A')}")
-        print(f"   🥉 Lowest Price      : {stats.get('lowest','N/A')}\n")
-        print(f"   ⬇️ Avg Below Trend   : {stats.get('avg_below_trend','N/A')}")
-        print(f"   ⬆️ Avg Above Trend   : {stats.get('avg_above_trend','N/A')}")
-        print(f"   💸 Profit Margin     : {stats.get('profit_margin','N/A')}")
-        print(f"   📊 Profit Margin %   : {profit_display}")
\ No newline at end of file
+def print_leaderboard(rows, metric):
+    """Print (squad, player) rows from `Leaderboard.top`."""
+    print(f"\n🏆 Top {len(rows)} Players across all squads by {metric}:")
+    for idx, (squad, player) in enumerate(rows, 1):
+        print_player(idx, player, squad)
@@ -0,0 +1,171 @@
+import argparse
+import math
+import operator
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product, repeat
+from .history import iter_sales
+from .utils import format_mk
+
+EA_TAX = 0.05
+
+
+class Market:
+    """Stored sales of every card merged into one time-ordered set of columns.
+
+    `ratio` is each sale's price over the card's trailing `window_hours` mean
+    (the same "trend" fetch_player_stats computes), NaN while there is no
+    earlier sale in the window. Built once and shared by every parameter set.
+    """
+
+    def __init__(self, sales, window_hours=24):
+        self.cards = []
+        per_card = {}
+        for player_id, _, platform, sold_at, price in sales:
+            per_card.setdefault((player_id, platform), []).append((sold_at.timestamp(), price))
+
+        ts, card, price, ratio = [], [], [], []
+        window = window_hours * 3600
+        for idx, (key, rows) in enumerate(per_card.items()):
+            self.cards.append(key)
+            rows.sort()
+            start, running = 0, 0
+            for i, (sold_ts, sold_price) in enumerate(rows):
+                # Trailing mean of the sales in [sold_ts - window, sold_ts), two-pointer
+                while start < i and rows[start][0] < sold_ts - window:
+                    running -= rows[start][1]
+                    start += 1
+                ratio.append(sold_price / (running / (i - start)) if i > start else math.nan)
+                ts.append(sold_ts)
+                card.append(idx)
+                price.append(sold_price)
+                running += sold_price
+
+        order = sorted(range(len(ts)), key=ts.__getitem__)
+        self.ts = array("d", (ts[i] for i in order))
+        self.card = array("l", (card[i] for i in order))
+        self.price = array("d", (price[i] for i in order))
+        self.ratio = array("d", (ratio[i] for i in order))
+
+    def __len__(self):
+        return len(self.ts)
+
+
+def simulate(market, buy_below, sell_above, capital=1_000_000, max_positions=10, per_card=1):
+    """Replay the market for one parameter set.
+
+    Buy one card at a sale's price when it is at least `buy_below` under trend,
+    sell every held copy when a sale is at least `sell_above` over trend, paying
+    EA_TAX on the sale. Open positions are marked at the card's last sale price.
+    """
+    # Signals for the whole tape in two column passes
+    buy_signal = list(map(operator.le, market.ratio, repeat(1 - buy_below)))
+    sell_signal = list(map(operator.ge, market.ratio, repeat(1 + sell_above)))
+
+    cash, holdings, open_count = float(capital), 0.0, 0
+    positions = {}   # card -> [buy prices]
+    last_price = {}
+    peak, max_drawdown, max_drawdown_pct = float(capital), 0.0, 0.0
+    trades = wins = 0
+    for i, (card, price) in enumerate(zip(market.card, market.price)):
+        held = positions.get(card)
+        if held:
+            holdings += (price - last_price[card]) * len(held)
+        last_price[card] = price
+
+        if held and sell_signal[i]:
+            proceeds = price * (1 - EA_TAX)
+            for cost in held:
+                trades += 1
+                wins += proceeds > cost
+            cash += proceeds * len(held)
+            holdings -= price * len(held)
+            open_count -= len(held)
+            positions[card] = []
+        elif buy_signal[i] and cash >= price and open_count < max_positions and len(held or ()) < per_card:
+            cash -= price
+            holdings += price
+            open_count += 1
+            positions.setdefault(card, []).append(price)
+
+        equity = cash + holdings
+        peak = max(peak, equity)
+        max_drawdown = max(max_drawdown, peak - equity)
+        # Against the peak at the time, so later gains do not shrink an early drawdown
+        max_drawdown_pct = max(max_drawdown_pct, (peak - equity) / peak if peak > 0 else 0.0)
+
+    equity = cash + holdings
+    return {
+        "buy_below": buy_below,
+        "sell_above": sell_above,
+        "pnl": round(equity - capital),
+        "trades": trades,
+        "hit_rate": round(wins / trades * 100, 2) if trades else None,
+        "max_drawdown": round(max_drawdown),
+        "max_drawdown_pct": round(max_drawdown_pct * 100, 2),
+        "open_positions": open_count,
+    }
+
+
+_market = None
+
+def _init_worker(market):
+    global _market
+    _market = market
+
+def _simulate_params(params):
+    return simulate(_market, *params)
+
+def run_grid(market, buy_thresholds, sell_thresholds, capital=1_000_000, max_positions=10, per_card=1, workers=None):
+    """Simulate every (buy, sell) pair, spread over `workers` processes (1 = in process)."""
+    grid = [(b, s, capital, max_positions, per_card) for b, s in product(buy_thresholds, sell_thresholds)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(grid) == 1:
+        return [simulate(market, *params) for params in grid]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(market,)) as pool:
+        return list(pool.map(_simulate_params, grid, chunksize=max(1, len(grid) // (workers * 4))))
+
+
+def print_report(results, limit=20):
+    print(f"\n{'buy<':>6} {'sell>':>6} {'P&L':>9} {'trades':>7} {'hit %':>7} {'max DD':>9} {'DD %':>6} {'open':>5}")
+    for r in sorted(results, key=lambda r: r["pnl"], reverse=True)[:limit]:
+        hit = f"{r['hit_rate']:.1f}" if r["hit_rate"] is not None else "N/A"
+        pnl = format_mk(abs(r["pnl"])) or "0"
+        print(f"{r['buy_below']:>6.0%} {r['sell_above']:>6.0%} {('-' if r['pnl'] < 0 else '') + pnl:>9} "
+              f"{r['trades']:>7} {hit:>7} {format_mk(r['max_drawdown']) or '0':>9} {r['max_drawdown_pct']:>6.1f} {r['open_positions']:>5}")
+
+
+def _fractions(text):
+    return [float(v) / 100 for v in text.split(",") if v.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="backtest", description="Replay stored sales against the buy-below/sell-above strategy.")
+    parser.add_argument("--buy", default="2,4,6,8,10", help="buy-below-trend thresholds in %% (comma separated)")
+    parser.add_argument("--sell", default="2,4,6,8,10", help="sell-above-trend thresholds in %% (comma separated)")
+    parser.add_argument("--capital", type=int, default=1_000_000)
+    parser.add_argument("--max-positions", type=int, default=10)
+    parser.add_argument("--per-card", type=int, default=1)
+    parser.add_argument("--window-hours", type=float, default=24)
+    parser.add_argument("--player", help="futbin player ID, or a name (every card of that name)")
+    parser.add_argument("--platform")
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    market = Market(iter_sales(args.player, args.platform, args.since, args.until), args.window_hours)
+    if not len(market):
+        print("⚠️ No stored sales history. Run the scraper first.")
+        return
+    results = run_grid(market, _fractions(args.buy), _fractions(args.sell),
+                       args.capital, args.max_positions, args.per_card, args.workers)
+    print(f"📊 {len(results)} parameter sets over {len(market)} sales of {len(market.cards)} cards "
+          f"in {time.time() - start:.2f}s")
+    print_report(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Microbenchmarks for the CPU paths: price/date parsing, the sales table
+walk, the stats block, ranking and cache I/O.
+
+    python app.py bench                  # run, compare with the baseline if there is one
+    python app.py bench --save-baseline  # record this machine's baseline
+    python app.py bench -k parse --max-size 1000 --threshold 10
+
+Inputs come from seeded generators (sales tables of 10..100k rows, caches
+of 10..10k players), so runs are comparable. Each case reports the best of
+`--repeat` timings; the command exits with status 1 when any case is more
+than `--threshold` percent slower than its baseline.
+"""
+import argparse
+import heapq
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+from .cache_manager import load_cache, save_cache
+from .constants import BENCH_BASELINE_FILE
+from .futbin_scraper import compute_stats, parse_sales_rows
+from .leaderboard import Leaderboard
+from .utils import mk_to_int, parse_futbin_datetime, parse_numeric_price
+
+SALES_SIZES = (10, 100, 1_000, 10_000, 100_000)
+CACHE_SIZES = (10, 100, 1_000, 10_000)
+BATCH = 1_000  # strings per parse_numeric_price / parse_futbin_datetime case
+SQUAD_SIZE = 11
+EPOCH = datetime(2025, 10, 1, 18, 0)  # fixed, so generated dates never depend on today
+
+
+# ---------------- generators ----------------
+def price_strings(n, seed=0):
+    """Prices as they appear on the site: '12,500', '35K', '1.2M', '--'."""
+    rng = random.Random(seed)
+    forms = (lambda v: f"{v:,}", lambda v: f"{v / 1000:.1f}K", lambda v: f"{v / 1_000_000:.2f}M", lambda v: "--")
+    return [rng.choice(forms)(rng.randint(200, 5_000_000)) for _ in range(n)]
+
+def date_strings(n, seed=0):
+    rng = random.Random(seed)
+    return [(EPOCH - timedelta(minutes=rng.randint(0, 20_000))).strftime("%b %d, %I:%M %p") for _ in range(n)]
+
+def sale_prices(n, seed=0):
+    rng = random.Random(seed)
+    base = rng.choice([12_000, 25_000, 80_000, 250_000, 1_200_000])
+    return [int(base * rng.uniform(0.9, 1.1)) for _ in range(n)]
+
+def sales_html(rows, seed=0):
+    """A sales page with `rows` rows, same markup as the live site and the fixture server."""
+    rng = random.Random(seed)
+    sold_at, body = EPOCH, []
+    for price in sale_prices(rows, seed):
+        sold_at -= timedelta(minutes=rng.randint(1, 30))
+        body.append(f"<tr><td><span>{sold_at.strftime('%b %d, %I:%M %p')}</span></td><td>{price:,}</td><td>Sold</td></tr>")
+    return ("<html><body><table><thead><tr><th>Date</th><th>Sold For</th><th>Status</th></tr></thead>"
+            f"<tbody>{''.join(body)}</tbody></table></body></html>")
+
+def players_cache(players, seed=0):
+    """A player stats cache of `players` players in squads of 11."""
+    rng = random.Random(seed)
+    cache = {}
+    for i in range(players):
+        stats = compute_stats(sale_prices(rng.randint(2, 40), seed + i))
+        checked = (EPOCH - timedelta(minutes=rng.randint(0, 600))).isoformat(timespec="microseconds")
+        cache.setdefault(f"Squad {i // SQUAD_SIZE + 1}", []).append(
+            {"player": f"Player {i}", "stats": stats, "last_checked": checked})
+    return cache
+
+
+# ---------------- cases ----------------
+def _players(cache):
+    return [p for players in cache.values() for p in players]
+
+def case_parse_numeric_price(size):
+    values = price_strings(BATCH)
+    return lambda: [parse_numeric_price(v) for v in values]
+
+def case_parse_futbin_datetime(size):
+    values = date_strings(BATCH)
+    return lambda: [parse_futbin_datetime(v) for v in values]
+
+def case_parse_sales_rows(size):
+    html = sales_html(size)
+    return lambda: parse_sales_rows(html)
+
+def case_compute_stats(size):
+    prices = sale_prices(size)
+    return lambda: compute_stats(prices)
+
+def case_sort_by_margin(size):
+    players = _players(players_cache(size))
+    return lambda: sorted(players, key=lambda p: mk_to_int(p["stats"]["profit_margin"]), reverse=True)
+
+def case_top5_by_margin(size):
+    players = _players(players_cache(size))
+    return lambda: heapq.nlargest(5, players, key=lambda p: mk_to_int(p["stats"]["profit_margin"]))
+
+def case_leaderboard_build(size):
+    cache = players_cache(size)
+    return lambda: Leaderboard.from_cache(cache).top("margin", 10)
+
+def _cache_file(size, tmp_dir):
+    path = os.path.join(tmp_dir, f"players_{size}.json")
+    if not os.path.exists(path):
+        save_cache(path, players_cache(size))
+    return path
+
+def case_save_cache(size, tmp_dir):
+    cache, path = players_cache(size), os.path.join(tmp_dir, f"save_{size}.json")
+    return lambda: save_cache(path, cache)
+
+def case_load_cache(size, tmp_dir):
+    path = _cache_file(size, tmp_dir)
+    return lambda: load_cache(path)
+
+# name -> (make(size[, tmp_dir]) -> callable, sizes, needs a temp dir)
+CASES = {
+    "parse_numeric_price": (case_parse_numeric_price, (BATCH,), False),
+    "parse_futbin_datetime": (case_parse_futbin_datetime, (BATCH,), False),
+    "parse_sales_rows": (case_parse_sales_rows, SALES_SIZES, False),
+    "compute_stats": (case_compute_stats, SALES_SIZES, False),
+    "sort_by_margin": (case_sort_by_margin, CACHE_SIZES, False),
+    "top5_by_margin": (case_top5_by_margin, CACHE_SIZES, False),
+    "leaderboard_build": (case_leaderboard_build, CACHE_SIZES, False),
+    "save_cache": (case_save_cache, CACHE_SIZES, True),
+    "load_cache": (case_load_cache, CACHE_SIZES, True),
+}
+
+
+def measure(fn, repeat=5, min_seconds=0.2):
+    """Best seconds per call over `repeat` rounds of enough calls to last `min_seconds`."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_seconds or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * min_seconds / max(elapsed, 1e-9) * 1.1))
+    best = min([elapsed] + timer.repeat(repeat - 1, number)) if repeat > 1 else elapsed
+    return best / number
+
+def run(pattern=None, max_size=None, repeat=5, min_seconds=0.2):
+    """{"name[size]": seconds per call} for every selected case, printed as they finish."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="futbin-bench-") as tmp_dir:
+        for name, (make, sizes, needs_dir) in CASES.items():
+            if pattern and pattern not in name:
+                continue
+            for size in sizes:
+                if max_size and size > max_size and len(sizes) > 1:
+                    continue
+                fn = make(size, tmp_dir) if needs_dir else make(size)
+                key = f"{name}[{size}]"
+                results[key] = measure(fn, repeat, min_seconds)
+                print(f"  {key:<32} {format_seconds(results[key]):>10}", flush=True)
+    return results
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+def load_baseline(path=BENCH_BASELINE_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(results, path=BENCH_BASELINE_FILE):
+    baseline = {"python": platform.python_version(), "machine": platform.machine(),
+                "created": datetime.now().isoformat(timespec="seconds"), "results": results}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline; returns the cases slower than baseline by more than `threshold` percent."""
+    regressions = []
+    print(f"\n{'case':<32} {'baseline':>10} {'now':>10} {'change':>8}")
+    for key, seconds in results.items():
+        before = baseline["results"].get(key)
+        if not before:
+            print(f"{key:<32} {'-':>10} {format_seconds(seconds):>10} {'new':>8}")
+            continue
+        change = (seconds / before - 1) * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = " ❌"
+        print(f"{key:<32} {format_seconds(before):>10} {format_seconds(seconds):>10} {change:>+7.1f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench", description="Microbenchmarks for parsing, stats, ranking and cache I/O.")
+    parser.add_argument("-k", dest="pattern", help="only cases whose name contains this")
+    parser.add_argument("--max-size", type=int, help="skip generated inputs larger than this")
+    parser.add_argument("--repeat", type=int, default=5, help="timing rounds per case (best is kept)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds each round runs for at least")
+    parser.add_argument("--baseline", default=BENCH_BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=20, help="allowed slowdown in %% before failing")
+    args = parser.parse_args(argv)
+
+    print(f"⏱ Benchmarks (best of {args.repeat}, Python {platform.python_version()})")
+    results = run(args.pattern, args.max_size, args.repeat, args.min_time)
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline) or {"results": {}}
+        save_baseline({**baseline["results"], **results}, args.baseline)
+        print(f"💾 Saved {len(results)} results to {args.baseline}")
+        return
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nℹ️ No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} case(s) regressed more than {args.threshold:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n✅ No case regressed more than {args.threshold:.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,151 @@
 import json
 import os
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from .constants import SQUAD_EXPIRY_MINUTES
+from . import metrics
+from .spans import span
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class CacheError(ValueError):
+    """A cache file exists but cannot be parsed."""
+
 
 def load_cache(file_path):
-    if not os.path.exists(file_path):
-        return {}
+    """Read a cache file without locking; {} if it does not exist yet.
+
+    Writers replace the file atomically, so a reader always sees a complete
+    snapshot and never waits on a slow writer. A file that cannot be parsed
+    raises CacheError (and an unreadable one OSError) rather than reading
+    as empty, so `merge_cache` never writes a few updates over a whole cache.
+    """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
+        with span("load_cache", file=file_path), open(file_path, "r", encoding="utf-8") as f:
             return json.load(f)
-    except:
+    except FileNotFoundError:
         return {}
+    except ValueError as e:  # json.JSONDecodeError, UnicodeDecodeError
+        raise CacheError(f"cannot read cache {file_path}: {e}") from e
+
+def _write_atomic(file_path, data):
+    with span("write_cache", file=file_path):
+        _write_file(file_path, data)
+    metrics.CACHE_WRITES.inc(file=os.path.basename(file_path))
+
+def _write_file(file_path, data):
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+@contextmanager
+def cache_lock(file_path):
+    """Exclusive advisory lock on `<file_path>.lock`, shared by all processes."""
+    lock_path = file_path + ".lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a+b") as lock_file:
+        with span("lock_wait", file=file_path):
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
 
 def save_cache(file_path, data):
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    """Overwrite the cache file with `data` (atomic, under the file lock)."""
+    with cache_lock(file_path):
+        _write_atomic(file_path, data)
+
+def stamp(entry):
+    """Set the per-entry version stamp used by `merge_cache`."""
+    entry["last_checked"] = datetime.now().isoformat(timespec="microseconds")
+    return entry
+
+def player_key(entry):
+    """Futbin player ID of a cached stats entry; the name for entries cached before IDs were kept."""
+    return entry.get("id") or entry.get("player")
+
+def _version(entry):
+    if not isinstance(entry, dict):
+        return ""
+    return entry.get("last_checked") or ""
+
+def merge_players(current, incoming):
+    """Merge one squad's stats entries by player, keeping the newest of each.
+
+    An entry with a futbin ID replaces one cached under the same name before IDs were kept.
+    """
+    merged = {player_key(p): p for p in current}
+    for p in incoming:
+        key = player_key(p)
+        legacy = merged.get(p["player"])
+        if p.get("id") and legacy is not None and not legacy.get("id"):
+            del merged[p["player"]]
+        if key not in merged or _version(p) >= _version(merged[key]):
+            merged[key] = p
+    return list(merged.values())
+
+def _merge_squad(newer, older):
+    """Squad entry `newer` (by last_checked) with the more recently scraped roster of the two.
+
+    Rosters are versioned by their own `roster_checked` stamp, so a squad
+    re-stamped elsewhere does not discard a roster scraped meanwhile.
+    """
+    if (older.get("roster_checked") or "") > (newer.get("roster_checked") or ""):
+        return {**newer, "players": older.get("players", []), "roster_checked": older["roster_checked"]}
+    return newer
+
+def _merge_entries(current, incoming):
+    merged = dict(current)
+    for key, value in incoming.items():
+        old = merged.get(key)
+        if isinstance(value, list) and isinstance(old, list):
+            merged[key] = merge_players(old, value)
+        elif old is None:
+            merged[key] = value
+        elif isinstance(value, dict) and isinstance(old, dict):
+            merged[key] = _merge_squad(value, old) if _version(value) >= _version(old) else _merge_squad(old, value)
+        elif _version(value) >= _version(old):
+            merged[key] = value
+    return merged
+
+def merge_cache(file_path, updates):
+    """Merge `updates` into the cache on disk, keeping the newest data per entry.
+
+    The file is re-read under the lock, so updates written by another process
+    since we loaded it are kept; if it cannot be read, nothing is written. Squad lists are merged per player and
+    squad entries per squad, each by their `last_checked` stamp (a squad's
+    roster by its `roster_checked` stamp).
+    Returns the merged cache.
+    """
+    with cache_lock(file_path):
+        merged = _merge_entries(load_cache(file_path), updates)
+        _write_atomic(file_path, merged)
+    return merged
 
 def is_fresh(item):
     last_checked = item.get("last_checked")
@@ -29,10 +160,10 @@ def is_recent(last_checked_str, max_age_minutes=30):
     """Return True if last_checked is within the last `max_age_minutes`."""
     if not last_checked_str:
         return False  # If it's None or missing, treat as stale
-    
+
     try:
         last_checked = datetime.fromisoformat(last_checked_str)
     except ValueError:
         return False  # Handle malformed timestamps gracefully
 
-    return datetime.now() - last_checked <= timedelta(minutes=max_age_minutes)
\ No newline at end of file
+    return datetime.now() - last_checked <= timedelta(minutes=max_age_minutes)
@@ -1,4 +1,42 @@
-SQUADS_URL = "https://www.futbin.com/squads"
+import os
+
+FUTBIN_URL = "https://www.futbin.com"
+# Host pages are actually loaded from; point at a local fixture server for testing
+BASE_URL = os.environ.get("FUTBIN_BASE_URL", FUTBIN_URL)
+SQUADS_URL = FUTBIN_URL + "/squads"
+# Isolated browser contexts per browser (see scraper/contexts.py) and the
+# consecutive failed pages after which one is retired and replaced
+BROWSER_CONTEXTS = 3
+CONTEXT_MAX_FAILURES = 3
+# User agents handed to contexts in turn (the scraper drives Firefox)
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.6; rv:131.0) Gecko/20100101 Firefox/131.0",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:131.0) Gecko/20100101 Firefox/131.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:130.0) Gecko/20100101 Firefox/130.0",
+]
+# Optional proxies, one per context in turn: FUTBIN_PROXIES=http://127.0.0.1:3128,http://127.0.0.1:3129
+PROXIES = [p.strip() for p in os.environ.get("FUTBIN_PROXIES", "").split(",") if p.strip()]
+# Squad links kept from the /squads page (season and promo path prefix)
+SQUAD_FILTER = os.environ.get("FUTBIN_SQUAD_FILTER", "/26/totw")
 SQUAD_CACHE_FILE = "data/squads.json"
 PLAYER_STATS_FILE = "data/players_24h_stats.json"
-SQUAD_EXPIRY_MINUTES = 30
\ No newline at end of file
+SQUAD_EXPIRY_MINUTES = 30
+ROSTER_EXPIRY_HOURS = 7 * 24  # rosters rarely change once a promo is out
+QUERIES_FILE = "data/queries.json"
+WATCHLIST_FILE = "data/watchlist.json"
+WATCHLIST_STATE_FILE = "data/watchlist_state.json"
+ALERTS_FILE = "data/alerts.jsonl"
+SALES_HISTORY_FILE = "data/sales_history.sqlite3"
+SCAN_JOURNAL_FILE = "data/scan_journal.sqlite3"
+BENCH_BASELINE_FILE = "data/bench_baseline.json"
+DEFAULT_PLATFORM = "pc"
+# Sales history pages read per card (see futbin_scraper.fetch_sales_history)
+MAX_SALES_PAGES = 10
+SALES_PAGE_CONCURRENCY = 3
+# Page HTML held in memory at once across all open pages (see futbin_scraper.load_sales_page)
+MAX_INFLIGHT_HTML_BYTES = 16 * 1024 * 1024
+WATCH_CONFIG_FILE = "data/watch.json"
+# Per-player refresh interval bounds, see scheduler.refresh_interval
+MIN_REFRESH_MINUTES = 5
+MAX_REFRESH_MINUTES = 180
@@ -0,0 +1,166 @@
+"""A pool of isolated browser contexts standing in for the single shared one.
+
+    pool = await ContextPool.create(browser, size=3)
+    page = await pool.new_page()   # same call the scraper makes on a context
+    ...
+    await pool.close()
+
+Every context has its own cookies and storage, a user agent from
+USER_AGENTS and, if FUTBIN_PROXIES lists any, its own proxy. Pages go to the
+healthy context with the fewest open pages. A context whose pages keep
+failing (HTTP 403/429, or timeouts while a challenge page is shown) is
+retired: it takes no new pages, is closed once its open pages finish, and
+a fresh context with the next user agent/proxy takes its slot.
+"""
+import asyncio
+import itertools
+from .constants import BROWSER_CONTEXTS, CONTEXT_MAX_FAILURES, PROXIES, USER_AGENTS
+
+BLOCKED_STATUSES = (403, 429)
+
+
+class SessionBlocked(Exception):
+    """The site refused a page for this session (HTTP 403/429)."""
+
+
+class PooledPage:
+    """A page of one pool context; reports navigation outcomes to its slot."""
+
+    def __init__(self, page, slot):
+        self._page = page
+        self._slot = slot
+
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+
+    async def goto(self, url, **kwargs):
+        try:
+            response = await self._page.goto(url, **kwargs)
+        except Exception:
+            self._slot.failed()
+            raise
+        if response is not None and response.status in BLOCKED_STATUSES:
+            self._slot.failed()
+            raise SessionBlocked(f"HTTP {response.status} for {url}")
+        return response
+
+    async def wait_for_selector(self, selector, **kwargs):
+        try:
+            element = await self._page.wait_for_selector(selector, **kwargs)
+        except Exception:
+            self._slot.failed()
+            raise
+        self._slot.succeeded()
+        return element
+
+    async def close(self):
+        try:
+            await self._page.close()
+        finally:
+            self._slot.page_closed()
+
+
+class ContextSlot:
+    """One context of the pool and its health."""
+
+    def __init__(self, pool, context, profile):
+        self.pool = pool
+        self.context = context
+        self.profile = profile  # {"user_agent": ..., "proxy": ...}
+        self.open_pages = 0
+        self.failures = 0  # consecutive
+        self.retired = False
+
+    def succeeded(self):
+        self.failures = 0
+
+    def failed(self):
+        self.failures += 1
+        if self.failures >= self.pool.max_failures and not self.retired:
+            self.pool.retire(self)
+
+    def page_closed(self):
+        self.open_pages -= 1
+        if self.retired and self.open_pages == 0:
+            self.pool.close_later(self.context)
+
+
+class ContextPool:
+    """`size` isolated contexts behind a context-like `new_page()`."""
+
+    def __init__(self, browser, size=BROWSER_CONTEXTS, user_agents=USER_AGENTS, proxies=PROXIES,
+                 max_failures=CONTEXT_MAX_FAILURES, log=print):
+        self.browser = browser
+        self.log = log
+        self.size = size
+        self.max_failures = max_failures
+        self.slots = []
+        self.retired = 0
+        # Every user agent and every proxy is used; the shorter list wraps around
+        agents, proxies = list(user_agents), list(proxies or [None])
+        self._profiles = itertools.cycle([
+            {"user_agent": agents[i % len(agents)], "proxy": proxies[i % len(proxies)]}
+            for i in range(max(len(agents), len(proxies)))
+        ])
+        self._replacing = set()  # tasks opening replacement contexts
+        self._closing = set()    # tasks closing retired contexts
+
+    @classmethod
+    async def create(cls, browser, size=BROWSER_CONTEXTS, **options):
+        pool = cls(browser, size, **options)
+        pool.slots = list(await asyncio.gather(*(pool._open() for _ in range(size))))
+        return pool
+
+    async def _open(self):
+        profile = next(self._profiles)
+        options = {"user_agent": profile["user_agent"]}
+        if profile["proxy"]:
+            options["proxy"] = {"server": profile["proxy"]}
+        return ContextSlot(self, await self.browser.new_context(**options), profile)
+
+    async def new_page(self):
+        while True:
+            healthy = [slot for slot in self.slots if not slot.retired]
+            if healthy:
+                break
+            if not self._replacing:
+                raise RuntimeError("no usable browser context left in the pool")
+            # Every context retired at once: wait for a replacement
+            await asyncio.wait(self._replacing, return_when=asyncio.FIRST_COMPLETED)
+        slot = min(healthy, key=lambda s: s.open_pages)
+        slot.open_pages += 1
+        try:
+            page = await slot.context.new_page()
+        except BaseException:
+            slot.page_closed()
+            raise
+        return PooledPage(page, slot)
+
+    def retire(self, slot):
+        """Stop giving `slot` pages and open a fresh context in its place."""
+        slot.retired = True
+        self.retired += 1
+        self.log(f"♻️ Retiring browser context ({slot.failures} failures in a row, {slot.profile['user_agent'][:40]}...)")
+        task = asyncio.get_running_loop().create_task(self._replace(slot))
+        self._replacing.add(task)
+        task.add_done_callback(self._replacing.discard)
+        if slot.open_pages == 0:
+            self.close_later(slot.context)
+
+    async def _replace(self, slot):
+        try:
+            fresh = await self._open()
+        except Exception as e:
+            self.log(f"⚠️ Could not open a replacement browser context: {e}")
+            return
+        self.slots[self.slots.index(slot)] = fresh
+
+    def close_later(self, context):
+        task = asyncio.get_running_loop().create_task(context.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close(self):
+        await asyncio.gather(*self._replacing, return_exceptions=True)
+        await asyncio.gather(*self._closing, return_exceptions=True)
+        await asyncio.gather(*(slot.context.close() for slot in self.slots), return_exceptions=True)
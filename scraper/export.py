@@ -0,0 +1,168 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime
+from itertools import islice
+from .cache_manager import load_cache, player_key
+from .constants import PLAYER_STATS_FILE, SALES_HISTORY_FILE, SQUAD_CACHE_FILE
+from .history import connect, iter_sales
+from .players import roster_key
+from .utils import STAT_COLUMNS, player_metrics
+
+FORMATS = ("csv", "jsonl", "parquet")
+CHUNK_ROWS = 50_000  # rows per Parquet row group / write
+
+# Column name -> type ("str", "int", "float" or "datetime") of every export source
+COLUMNS = {
+    "players": {"squad": "str", "id": "str", "player": "str", "last_checked": "datetime",
+                **{name: "int" if name == "sales_24h" else "float" for name in STAT_COLUMNS}},
+    "sales": {"id": "str", "player": "str", "platform": "str", "sold_at": "datetime", "price": "int"},
+    "rollups": {"id": "str", "player": "str", "platform": "str", "day": "str", "sales": "int",
+                "min_price": "int", "max_price": "int", "avg_price": "float"},
+}
+
+
+class ExportError(ValueError):
+    """Bad export request (unknown source/format, missing pyarrow)."""
+
+
+# ---------------- sources ----------------
+def squad_players(squad, squads_file=SQUAD_CACHE_FILE, players_file=PLAYER_STATS_FILE):
+    """Futbin IDs of the cards rostered in (or cached for) `squad`, as the sales store keys them."""
+    keys = {roster_key(p) for p in load_cache(squads_file).get(squad, {}).get("players", [])}
+    keys.update(player_key(p) for p in load_cache(players_file).get(squad, []))
+    return keys
+
+def iter_players(squad=None, since=None, until=None, file_path=PLAYER_STATS_FILE):
+    """Cached players as typed rows, filtered by squad and last_checked."""
+    for squad_name, players in load_cache(file_path).items():
+        if squad and squad_name != squad:
+            continue
+        for player in players:
+            checked = player.get("last_checked")
+            checked = datetime.fromisoformat(checked) if checked else None
+            if (since and (not checked or checked < since)) or (until and (not checked or checked >= until)):
+                continue
+            yield {"squad": squad_name, "id": player.get("id"), "player": player["player"], "last_checked": checked,
+                   **player_metrics(player)}
+
+def iter_sale_rows(squad=None, since=None, until=None, platform=None, file_path=SALES_HISTORY_FILE):
+    """Stored sales straight off the SQLite cursor, optionally only one squad's players."""
+    keys = squad_players(squad) if squad else None
+    for key, player, plat, sold_at, price in iter_sales(None, platform, since, until, file_path):
+        if keys is None or key in keys:
+            yield {"id": key, "player": player, "platform": plat, "sold_at": sold_at, "price": price}
+
+def iter_rollups(squad=None, since=None, until=None, platform=None, file_path=SALES_HISTORY_FILE):
+    """Per player, platform and day: sale count, min, max and average price (aggregated in SQLite)."""
+    if not os.path.exists(file_path):
+        return
+    keys = squad_players(squad) if squad else None
+    clauses, params = [], []
+    for column, op, value in (("platform", "=", platform), ("sold_at", ">=", since), ("sold_at", "<", until)):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(value.isoformat() if isinstance(value, datetime) else value)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    with closing(connect(file_path)) as conn:
+        for key, player, plat, day, count, low, high, avg in conn.execute(
+            "SELECT player_id, MAX(player), platform, substr(sold_at, 1, 10), COUNT(*), MIN(price), MAX(price), "
+            f"AVG(price) FROM sales{where} GROUP BY 1, 3, 4 ORDER BY 1, 3, 4", params
+        ):
+            if keys is None or key in keys:
+                yield {"id": key, "player": player, "platform": plat, "day": day, "sales": count,
+                       "min_price": low, "max_price": high, "avg_price": round(avg, 2)}
+
+SOURCES = {"players": iter_players, "sales": iter_sale_rows, "rollups": iter_rollups}
+
+
+# ---------------- writers ----------------
+def _text(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def write_csv(rows, columns, out):
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow("" if row[c] is None else _text(row[c]) for c in columns)
+        count += 1
+    return count
+
+def write_jsonl(rows, columns, out):
+    count = 0
+    for row in rows:
+        out.write(json.dumps({c: _text(row[c]) for c in columns}, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+def write_parquet(rows, columns, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export needs pyarrow (pip install pyarrow)") from None
+    types = {"str": pa.string(), "int": pa.int64(), "float": pa.float64(), "datetime": pa.timestamp("us")}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns.items()])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        while True:
+            chunk = list(islice(rows, CHUNK_ROWS))
+            if not chunk:
+                break
+            writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+    return count
+
+def export(source, fmt, output=None, squad=None, since=None, until=None, platform=None):
+    """Stream `source` rows to `output` (stdout for csv/jsonl when None); returns the row count."""
+    if source not in SOURCES:
+        raise ExportError(f"unknown source {source!r} (choose from {', '.join(SOURCES)})")
+    if fmt not in FORMATS:
+        raise ExportError(f"unknown format {fmt!r} (choose from {', '.join(FORMATS)})")
+    if source == "players" and platform:
+        raise ExportError("cached players are not split by platform")
+    filters = {"squad": squad, "since": since, "until": until}
+    if source != "players":
+        filters["platform"] = platform
+    rows = iter(SOURCES[source](**filters))
+    columns = COLUMNS[source]
+
+    if fmt == "parquet":
+        if not output:
+            raise ExportError("Parquet export needs an output file (-o)")
+        return write_parquet(rows, columns, output)
+    write = write_csv if fmt == "csv" else write_jsonl
+    if not output:
+        return write(rows, list(columns), sys.stdout)
+    with open(output, "w", encoding="utf-8", newline="") as out:
+        return write(rows, list(columns), out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="export", description="Stream cached players, sales history or daily "
+                                     "rollups to CSV, JSONL or Parquet with numeric columns.")
+    parser.add_argument("source", choices=list(SOURCES))
+    parser.add_argument("--format", "-f", choices=FORMATS, help="default: from the output extension, else csv")
+    parser.add_argument("--output", "-o", help="file to write (csv/jsonl default to stdout)")
+    parser.add_argument("--squad")
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument("--platform")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or (os.path.splitext(args.output)[1].lstrip(".").lower() if args.output else "csv")
+    try:
+        count = export(args.source, fmt, args.output, args.squad, args.since, args.until, args.platform)
+    except (ExportError, sqlite3.Error) as e:
+        print(f"❌ Export failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.output:
+        print(f"📦 Exported {count} {args.source} rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Local stand-in for futbin, serving synthetic squad, roster and sales pages.
+
+    python -m scraper.fixture_server --port 8765
+    FUTBIN_BASE_URL=http://127.0.0.1:8765 python app.py watch
+
+Pages use the same markup the scraper selects on. Prices are seeded by
+player ID and the current minute, so repeated fetches see the market move.
+With --throttle N every session cookie is cut off with HTTP 429 after N
+pages, to exercise browser context rotation (scraper/contexts.py).
+"""
+import argparse
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SQUAD_SIZE = 11
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    squads = 3
+    sales_rows = 60
+    latency = 0.0
+    throttle = 0      # pages a session cookie may load before it is flagged (0 = never)
+    sessions = None   # session id -> pages loaded, set per server by serve()
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        self.session = None
+        if self.throttle and self._throttled():
+            return self._send("<html><body>Too many requests</body></html>", status=429)
+        path = urlsplit(self.path).path
+        if path == "/squads":
+            return self._send(self._squads_page())
+        match = re.fullmatch(r"/26/totw/Fixture(\d+)", path)
+        if match:
+            return self._send(self._roster_page(int(match.group(1))))
+        match = re.fullmatch(r"/26/sales/(\d+)/[\w-]+", path)
+        if match:
+            page = parse_qs(urlsplit(self.path).query).get("page", ["1"])[0]
+            return self._send(self._sales_page(int(match.group(1)), int(page) if page.isdigit() else 1))
+        self._send("<html><body>Not found</body></html>", status=404)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _throttled(self):
+        """Count the page against its session cookie (issuing one if missing); True once over the limit.
+
+        A flagged session stays blocked, like a rate-limited or challenged
+        session on the live site; a new browser context gets a new cookie.
+        """
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        session = cookie["fixture_session"].value if "fixture_session" in cookie else None
+        if session not in self.sessions:
+            session = uuid.uuid4().hex
+            self.sessions[session] = 0
+            self.session = session
+        self.sessions[session] += 1
+        return self.sessions[session] > self.throttle
+
+    def _send(self, body, status=200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        if self.session:
+            self.send_header("Set-Cookie", f"fixture_session={self.session}; Path=/")
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _squads_page(self):
+        links = "".join(
+            f'<a class="squad-box text-ellipsis xs-column" href="/26/totw/Fixture{n}">'
+            f'<div class="squads-header bold">Fixture Squad {n}</div></a>'
+            for n in range(1, self.squads + 1)
+        )
+        return f"<html><body>{links}</body></html>"
+
+    def _roster_page(self, squad):
+        cards = "".join(
+            f'<div id="cardlid{i}"><a href="/26/player/{squad * 100 + i}/fixture-player-{squad * 100 + i}">'
+            f'<div class="playercard-26 playercard-m pointer-events-none" title="Fixture Player {squad * 100 + i}"></div>'
+            f"</a></div>"
+            for i in range(1, SQUAD_SIZE + 1)
+        )
+        return f"<html><body>{cards}</body></html>"
+
+    def _sales_page(self, player_id, page=1):
+        """Page `page` of the player's sales, `sales_rows` rows each, newest first."""
+        now = datetime.now().replace(second=0, microsecond=0)
+        rng = random.Random(player_id * 1_000_003 + int(time.time() // 60))
+        base = random.Random(player_id).choice([12_000, 25_000, 80_000, 250_000, 1_200_000])
+        rows = []
+        sold_at = now
+        for _ in range(self.sales_rows * page):
+            sold_at -= timedelta(minutes=rng.randint(5, 45))
+            price = int(base * rng.uniform(0.9, 1.1))
+            rows.append(
+                f"<tr><td><span>{sold_at.strftime('%b %d, %I:%M %p')}</span></td>"
+                f"<td>{price:,}</td><td>Sold</td></tr>"
+            )
+        return (
+            "<html><body><table><thead><tr><th>Date</th><th>Sold For</th><th>Status</th></tr></thead>"
+            f"<tbody>{''.join(rows[-self.sales_rows:])}</tbody></table></body></html>"
+        )
+
+
+def serve(host="127.0.0.1", port=8765, squads=3, sales_rows=60, latency=0.0, throttle=0):
+    handler = type("Handler", (FixtureHandler,), {"squads": squads, "sales_rows": sales_rows, "latency": latency,
+                                                  "throttle": throttle, "sessions": {}})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"🧪 Fixture server on http://{host}:{port} (FUTBIN_BASE_URL=http://{host}:{port})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--squads", type=int, default=3)
+    parser.add_argument("--sales-rows", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to delay every response")
+    parser.add_argument("--throttle", type=int, default=0,
+                        help="pages per session cookie before that session only gets HTTP 429")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.squads, args.sales_rows, args.latency, args.throttle)
@@ -1,73 +1,92 @@
 # scraper/futbin_scraper.py
 import asyncio
+import hashlib
+import math
+import statistics
+import time
+import weakref
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
-from .utils import parse_numeric_price, parse_futbin_datetime, format_mk
-from.cache_manager import save_cache, load_cache
-from .constants import PLAYER_STATS_FILE, SQUAD_CACHE_FILE, SQUAD_EXPIRY_MINUTES, SQUADS_URL
+from bs4 import BeautifulSoup, SoupStrainer
+from .utils import parse_numeric_price, parse_futbin_datetime, format_mk, rebase_url
+from .cache_manager import save_cache, load_cache, merge_cache, merge_players, stamp
+from .constants import PLAYER_STATS_FILE, SQUAD_CACHE_FILE, SQUAD_EXPIRY_MINUTES, SQUADS_URL, SQUAD_FILTER, DEFAULT_PLATFORM, FUTBIN_URL
+from .constants import MAX_INFLIGHT_HTML_BYTES, MAX_SALES_PAGES, SALES_PAGE_CONCURRENCY
+from .history import record_sales
+from .players import player_id
+from .scheduler import ByteBudget
+from . import metrics
+from .spans import outcome, span
 
 SELECTOR_SQUAD_LINKS = "a.squad-box.text-ellipsis.xs-column"
 SELECTOR_PLAYER_CARD = "div[id^='cardlid']"
 
-async def fetch_squads(context, squads_url):
+# Page HTML is reserved against a ByteBudget before it is read, at the
+# running average page size, and released once the page is parsed
+_html_budgets = weakref.WeakKeyDictionary()  # event loop -> its ByteBudget
+page_bytes = 256 * 1024  # running average, updated from every page read
+
+def html_budget():
+    """ByteBudget of the running event loop; its asyncio.Condition cannot be shared across loops,
+    and the TUI and interactive menu call asyncio.run more than once per process."""
+    loop = asyncio.get_running_loop()
+    budget = _html_budgets.get(loop)
+    if budget is None:
+        budget = _html_budgets[loop] = ByteBudget(MAX_INFLIGHT_HTML_BYTES)
+    return budget
+
+async def fetch_squads(context, squads_url, squad_filter=SQUAD_FILTER):
+    """Squads listed on the /squads page whose link contains `squad_filter`, rosters not loaded."""
     page = await context.new_page()
-    await page.goto(squads_url, timeout=60000)
+    await page.goto(rebase_url(squads_url), timeout=60000)
     await page.wait_for_selector(SELECTOR_SQUAD_LINKS)
     squad_elements = await page.query_selector_all(SELECTOR_SQUAD_LINKS)
     squads = {}
     for a in squad_elements:
         href = await a.get_attribute("href")
-        if href and "/26/totw" in href:
+        if href and squad_filter in href:
             div = await a.query_selector("div.squads-header.bold")
             if div:
                 name = (await div.inner_text()).strip()
-                squads[name] = {"url": "https://www.futbin.com" + href, "last_checked": None, "players": []}
+                squads[name] = {"url": FUTBIN_URL + href, "last_checked": None, "players": []}
     await page.close()
     return squads
 
-async def scrape_squad_players(context, squad_url):
-    """Scrape all player URLs from a squad page (returns list of {Player, URL})."""
-    page = await context.new_page()
-    await page.goto(squad_url)
-    await page.wait_for_selector(SELECTOR_PLAYER_CARD)
-    player_urls = []
-    for i in range(1, 12):
-        card = await page.query_selector(f"div#cardlid{i} a")
-        if not card:
-            continue
-        href = await card.get_attribute("href")
-        name_div = await card.query_selector("div.playercard-26.playercard-m.pointer-events-none")
-        name = await name_div.get_attribute("title") if name_div else f"Player {i}"
-        player_urls.append({"Player": name, "URL": "https://www.futbin.com" + href})
-    await page.close()
-    return player_urls
+def table_fingerprint(html):
+    """Hash of the page's first <table> (the sales table), or None if it has none.
 
-async def fetch_player_stats(context, player_info, cutoff_time):
-    """Scrape the player's sales page for the last 24h and compute stats."""
-    player_name = player_info["Player"]
-    player_url = player_info["URL"].replace("/player/", "/sales/") + "?platform=pc"
+    Only the table's markup is hashed, so ads and other page chrome changing
+    between loads do not count as a change.
+    """
+    start = html.find("<table")
+    if start < 0:
+        return None
+    end = html.find("</table>", start)
+    region = html[start:] if end < 0 else html[start:end]
+    return hashlib.blake2b(region.encode("utf-8"), digest_size=16).hexdigest()
 
-    page = await context.new_page()
+def parse_sales_table(html, cutoff_time):
+    """Sold-for prices, in page order, of the sales rows newer than `cutoff_time`."""
+    return [price for _, price in parse_sales_rows(html, cutoff_time)]
+
+def parse_sales_rows(html, cutoff_time=None):
+    """(datetime, price) of every sales row, in page order, newer than `cutoff_time` if given."""
+    # Only <table> subtrees are built, and the tree is freed as soon as the rows are out
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("table"))
     try:
-        await page.goto(player_url, timeout=60000)
-        await page.wait_for_selector("table", timeout=30000)
-        html = await page.content()
-    except Exception:
-        await page.close()
-        return None
-    await page.close()
+        return _table_rows(soup.find("table"), cutoff_time)
+    finally:
+        soup.decompose()
 
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table")
+def _table_rows(table, cutoff_time):
     if not table:
-        return None
+        return []
 
     headers = [th.get_text(strip=True).lower() for th in table.select("thead th")]
     date_idx = headers.index("date") if "date" in headers else None
     sold_idx = headers.index("sold for") if "sold for" in headers else None
 
-    sold_prices = []
+    rows = []
     for tr in table.select("tbody tr"):
         tds = tr.find_all("td")
         if not tds:
@@ -78,19 +97,26 @@ async def fetch_player_stats(context, player_info, cutoff_time):
             span = tds[date_idx].find("span")
             if span:
                 date_value = parse_futbin_datetime(span.get_text(strip=True))
-        if not date_value or date_value < cutoff_time:
+        if not date_value or (cutoff_time and date_value < cutoff_time):
             continue
 
         if sold_idx is not None and sold_idx < len(tds):
             sold_value = parse_numeric_price(tds[sold_idx].get_text(strip=True))
             if sold_value:
-                sold_prices.append(sold_value)
+                rows.append((date_value, sold_value))
+    return rows
 
-    if not sold_prices:
-        return None
+def compute_stats(sold_prices):
+    """Trend, spread and buy-below/sell-above margin (after 5% EA tax) of a sales sample.
 
-    # Compute stats
+    An empty sample (no sales in the window) gives sales_24h 0 and no prices.
+    """
+    if not sold_prices:
+        return {**dict.fromkeys(("trend_value", "average_buy_now", "highest", "lowest", "avg_below_trend",
+                                 "avg_above_trend", "profit_margin", "profit_margin_pct", "trend_pct")),
+                "sales_24h": 0, "volatility_pct": None}
     trend_value = sum(sold_prices) // len(sold_prices)
+    volatility_pct = round(statistics.pstdev(sold_prices) / trend_value * 100, 2) if trend_value else None
     highest_price = max(sold_prices)
     lowest_price = min(sold_prices)
     below_prices = [p for p in sold_prices if p < trend_value]
@@ -110,40 +136,179 @@ async def fetch_player_stats(context, player_info, cutoff_time):
     )
 
     return {
-        "player": player_name,
-        "stats": {
-            "trend_value": format_mk(trend_value),
-            "average_buy_now": format_mk(avg_above),
-            "highest": format_mk(highest_price),
-            "lowest": format_mk(lowest_price),
-            "avg_below_trend": format_mk(avg_below),
-            "avg_above_trend": format_mk(avg_above),
-            "profit_margin": format_mk(profit_margin),
-            "profit_margin_pct": profit_margin_pct,
-            "trend_pct": trend_pct,
-        },
+        "trend_value": format_mk(trend_value),
+        "average_buy_now": format_mk(avg_above),
+        "highest": format_mk(highest_price),
+        "lowest": format_mk(lowest_price),
+        "avg_below_trend": format_mk(avg_below),
+        "avg_above_trend": format_mk(avg_above),
+        "profit_margin": format_mk(profit_margin),
+        "profit_margin_pct": profit_margin_pct,
+        "trend_pct": trend_pct,
+        "sales_24h": len(sold_prices),
+        "volatility_pct": volatility_pct,
     }
 
-    async def fetch_squads(context, squads_url):
+def sales_page_url(player_info, page=1):
+    url = player_info["URL"].replace("/player/", "/sales/") + f"?platform={DEFAULT_PLATFORM}"
+    return url if page == 1 else f"{url}&page={page}"
+
+async def load_sales_page(context, url, player_name, known_table=None, budget=None):
+    """(sales rows, table fingerprint) of one sales page; raises if it does not load.
+
+    When the fingerprint equals `known_table` the page is not parsed and
+    the rows are None. The HTML is held against `budget` (default: the
+    running loop's html_budget()).
+    """
+    global page_bytes
+    with span("new_page", player=player_name):
         page = await context.new_page()
-        await page.goto(squads_url, timeout=60000)
-        await page.wait_for_selector(SELECTOR_SQUAD_LINKS)
-        squad_elements = await page.query_selector_all(SELECTOR_SQUAD_LINKS)
-        squads = {}
-        for a in squad_elements:
-            href = await a.get_attribute("href")
-            if href and "/26/totw" in href:
-                div = await a.query_selector("div.squads-header.bold")
-                if div:
-                    name = (await div.inner_text()).strip()
-                    squads[name] = {"url": "https://www.futbin.com" + href, "last_checked": None, "players": []}
+    metrics.PAGES_OPEN.inc()
+    try:
+        started = time.perf_counter()
+        with span("goto", player=player_name):
+            await page.goto(rebase_url(url), timeout=60000)
+        with span("wait_for_selector", player=player_name):
+            await page.wait_for_selector("table", timeout=30000)
+        async with (budget or html_budget()).reserve(page_bytes):
+            with span("content", player=player_name):
+                html = await page.content()
+            metrics.FETCH_SECONDS.observe(time.perf_counter() - started)
+            size = len(html.encode("utf-8"))
+            page_bytes = 0.8 * page_bytes + 0.2 * size
+            metrics.PAGES_FETCHED.inc(kind="player")
+            metrics.BYTES_DOWNLOADED.inc(size)
+
+            fingerprint = table_fingerprint(html)
+            if known_table and fingerprint == known_table:
+                return None, fingerprint
+            started = time.perf_counter()
+            with span("parse", player=player_name):
+                rows = parse_sales_rows(html)
+            del html
+            metrics.PARSE_SECONDS.observe(time.perf_counter() - started)
+    finally:
+        # Also runs when the fetch is cancelled (scan_all --budget deadline)
+        metrics.PAGES_OPEN.dec()
         await page.close()
-        return squads
+    return rows, fingerprint
+
+def _boundary_overlap(previous, rows):
+    """Length of the longest tail of `previous` that `rows` starts with."""
+    for size in range(min(len(previous), len(rows)), 0, -1):
+        if previous[-size:] == rows[:size]:
+            return size
+    return 0
+
+def merge_sales_pages(pages):
+    """Rows of consecutive sales pages as one newest-first list.
+
+    Sales arriving while the pages load push rows down, so the top of one
+    page can repeat the bottom of the one before; that overlap is dropped.
+    Identical sales within a page are kept.
+    """
+    merged = []
+    for rows in pages:
+        merged.extend(rows[_boundary_overlap(merged, rows):])
+    merged.sort(key=lambda row: row[0], reverse=True)  # stable: same-minute sales keep page order
+    return merged
+
+def _pages_left(pages, window_start):
+    """Estimated further pages needed to reach `window_start` (0 when the last page already does)."""
+    first, last = pages[0], pages[-1]
+    if not last or len(last) < len(first) or min(sold_at for sold_at, _ in last) < window_start:
+        return 0
+    newest, oldest = first[0][0], min(sold_at for sold_at, _ in last)
+    per_page = (newest - oldest) / len(pages)
+    if per_page <= timedelta(0):
+        return 1
+    return max(1, math.ceil((oldest - window_start) / per_page))
+
+async def fetch_sales_history(context, player_info, window_start, page_budget=None, known_table=None, page_slots=None):
+    """Sales rows back to `window_start`, reading further sales pages while they are needed.
+
+    After the first page, up to SALES_PAGE_CONCURRENCY pages load at once
+    (fewer when the first pages show the window is nearly covered), each
+    waiting on `page_budget` (a scheduler.PageBudget) if given. With
+    `page_slots` (an asyncio.Semaphore shared by a scan) every page, the
+    first included, holds a slot while open. Returns
+    (rows, pages read, complete, first page's table fingerprint); complete
+    is False when a later page failed. If the first page's table matches
+    `known_table` nothing further is read or parsed and rows is None.
+    """
+    player_name = player_info["Player"]
+    slot = page_slots or nullcontext()
+    async with slot:
+        first, fingerprint = await load_sales_page(context, sales_page_url(player_info), player_name, known_table)
+    if first is None:
+        return None, 1, True, fingerprint
+    pages = [first]
+
+    async def load(number):
+        if page_budget:
+            await page_budget.acquire()
+        async with slot:
+            rows, _ = await load_sales_page(context, sales_page_url(player_info, number), player_name)
+        return rows
+
+    complete = True
+    while complete and len(pages) < MAX_SALES_PAGES and (wanted := _pages_left(pages, window_start)):
+        numbers = range(len(pages) + 1, min(len(pages) + min(wanted, SALES_PAGE_CONCURRENCY), MAX_SALES_PAGES) + 1)
+        for result in await asyncio.gather(*(load(n) for n in numbers), return_exceptions=True):
+            if isinstance(result, Exception):
+                metrics.FETCH_FAILURES.inc(cause=type(result).__name__)
+                complete = False
+                break
+            pages.append(result)
+            if not _pages_left(pages, window_start):
+                break
+    return merge_sales_pages(pages), len(pages), complete, fingerprint
+
+async def fetch_player_stats(context, player_info, cutoff_time, window_start=None, page_budget=None, previous=None,
+                             page_slots=None):
+    """Scrape the player's sales history and compute stats over the sales since `cutoff_time`.
+
+    History is read back to `window_start` (default `cutoff_time`) and all of
+    it is stored in the sales history. `previous` is the player's cached
+    entry: if the sales table is the one its stats were computed from, the
+    entry is only re-stamped (see utils.table_unchanged). `page_budget` and
+    `page_slots` apply to every sales page (see fetch_sales_history).
+    """
+    player_name = player_info["Player"]
+    known_table = previous.get("table_hash") if previous else None
+    try:
+        rows, pages, complete, fingerprint = await fetch_sales_history(
+            context, player_info, window_start or cutoff_time, page_budget, known_table, page_slots)
+    except Exception as e:
+        outcome(player_name, "error", error=type(e).__name__)
+        metrics.FETCH_FAILURES.inc(cause=type(e).__name__)
+        return None
+    if rows is None:
+        outcome(player_name, "unchanged")
+        metrics.UNCHANGED_TABLES.inc()
+        return stamp(dict(previous))
+
+    with span("record_sales", player=player_name):
+        record_sales(player_id(player_info["URL"]) or player_name, player_name, DEFAULT_PLATFORM, rows)
+    sold_prices = [price for sold_at, price in rows if sold_at >= cutoff_time]
+    with span("stats", player=player_name):
+        stats = compute_stats(sold_prices)
+    if not sold_prices:
+        # Still cached: sales_24h 0 gives the card the longest refresh interval
+        outcome(player_name, "no_sales", pages=pages)
+    else:
+        outcome(player_name, "ok", pages=pages, **({} if complete else {"truncated": True}))
+    entry = stamp({"id": player_id(player_info["URL"]), "player": player_name, "stats": stats, "table_hash": fingerprint})
+    entry["table_changed"] = entry["last_checked"]
+    return entry
 
 async def scrape_squad_players(context, squad_url):
+    """Scrape all player URLs from a squad page (returns list of {Player, URL})."""
     page = await context.new_page()
-    await page.goto(squad_url)
-    await page.wait_for_selector(SELECTOR_PLAYER_CARD)
+    with span("roster", url=squad_url):
+        await page.goto(rebase_url(squad_url))
+        await page.wait_for_selector(SELECTOR_PLAYER_CARD)
+    metrics.PAGES_FETCHED.inc(kind="roster")
     player_urls = []
     for i in range(1, 12):
         card = await page.query_selector(f"div#cardlid{i} a")
@@ -151,95 +316,32 @@ async def scrape_squad_players(context, squad_url):
             continue
         href = await card.get_attribute("href")
         name_div = await card.query_selector("div.playercard-26.playercard-m.pointer-events-none")
-        name = await name_div.get_attribute("title") if name_div else f"Player {i}"
-        player_urls.append({"Player": name, "URL": "https://www.futbin.com" + href})
+        name = await name_div.get_attribute("title") if name_div else None
+        # Cards are told apart by the ID in href; the slug only stands in for a missing title
+        name = name or href.rstrip("/").rsplit("/", 1)[-1].replace("-", " ").title() or f"Player {i}"
+        player_urls.append({"Player": name, "URL": FUTBIN_URL + href})
     await page.close()
     return player_urls
 
-async def fetch_player_stats_test(context, player_info, squad_name, squads_cache, player_stats_cache):
+async def fetch_player_stats_test(context, player_info, squad_name, squads_cache, player_stats_cache, previous=None):
     """Fetch player stats AND update caches automatically."""
-    cutoff_time = datetime.now() - timedelta(hours=24)
-    player_name = player_info["Player"]
-    player_url = player_info["URL"].replace("/player/", "/sales/") + "?platform=pc"
-
-    page = await context.new_page()
-    try:
-        await page.goto(player_url, timeout=60000)
-        await page.wait_for_selector("table", timeout=30000)
-        html = await page.content()
-    except:
-        await page.close()
-        return None
-    await page.close()
-
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table")
-    if not table:
+    # Same fetch as scan_all (and the same spans/outcomes), then the cache updates below
+    player_data = await fetch_player_stats(context, player_info, datetime.now() - timedelta(hours=24),
+                                           previous=previous)
+    if not player_data:
         return None
 
-    headers = [th.get_text(strip=True).lower() for th in table.select("thead th")]
-    date_idx = headers.index("date") if "date" in headers else None
-    sold_idx = headers.index("sold for") if "sold for" in headers else None
-
-    sold_prices = []
-    for tr in table.select("tbody tr"):
-        tds = tr.find_all("td")
-        if not tds: continue
-
-        date_value = None
-        if date_idx is not None and date_idx < len(tds):
-            span = tds[date_idx].find("span")
-            if span:
-                date_value = parse_futbin_datetime(span.get_text(strip=True))
-        if not date_value or date_value < cutoff_time:
-            continue
-
-        if sold_idx is not None and sold_idx < len(tds):
-            sold_value = parse_numeric_price(tds[sold_idx].get_text(strip=True))
-            if sold_value:
-                sold_prices.append(sold_value)
-
-    if not sold_prices:
-        return None
-
-    # Compute stats
-    trend_value = sum(sold_prices) // len(sold_prices)
-    highest_price = max(sold_prices)
-    lowest_price = min(sold_prices)
-    below_prices = [p for p in sold_prices if p < trend_value]
-    above_prices = [p for p in sold_prices if p > trend_value]
-    avg_below = sum(below_prices) // len(below_prices) if below_prices else None
-    avg_above = sum(above_prices) // len(above_prices) if above_prices else None
-    profit_margin = int(avg_above - avg_below * 1.05) if avg_above and avg_below else None
-    profit_margin_pct = round(((avg_above - avg_below * 1.05) / (avg_below * 1.05) * 100), 2) if avg_above and avg_below else None
-    trend_pct = round(((sold_prices[-1] - sold_prices[0]) / sold_prices[0]) * 100, 2) if sold_prices and sold_prices[0] != 0 else None
-
-    player_data = {
-        "player": player_name,
-        "stats": {
-            "trend_value": format_mk(trend_value),
-            "average_buy_now": format_mk(avg_above),
-            "highest": format_mk(highest_price),
-            "lowest": format_mk(lowest_price),
-            "avg_below_trend": format_mk(avg_below),
-            "avg_above_trend": format_mk(avg_above),
-            "profit_margin": format_mk(profit_margin),
-            "profit_margin_pct": profit_margin_pct,
-            "trend_pct": trend_pct,
-        }
-    }
-
     # ---------------- UPDATE CACHES ----------------
-    player_stats_cache[squad_name] = player_stats_cache.get(squad_name, [])
-    # Remove previous entry if exists
-    player_stats_cache[squad_name] = [p for p in player_stats_cache[squad_name] if p['player'] != player_name]
-    player_stats_cache[squad_name].append(player_data)
+    # Replaces the previous entry of the same card (by futbin ID)
+    player_stats_cache[squad_name] = merge_players(player_stats_cache.get(squad_name, []), [player_data])
 
     # Update squad last_checked
     if squad_name in squads_cache:
-        squads_cache[squad_name]['last_checked'] = datetime.now().isoformat()
+        stamp(squads_cache[squad_name])
 
-    save_cache(PLAYER_STATS_FILE, player_stats_cache)
-    save_cache(SQUAD_CACHE_FILE, squads_cache)
+    # Merge only what changed, so a concurrent scan_all keeps its updates
+    merge_cache(PLAYER_STATS_FILE, {squad_name: [player_data]})
+    if squad_name in squads_cache:
+        merge_cache(SQUAD_CACHE_FILE, {squad_name: squads_cache[squad_name]})
 
     return player_data
\ No newline at end of file
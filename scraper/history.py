@@ -0,0 +1,104 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from .constants import SALES_HISTORY_FILE
+
+# Sales are keyed by the card's futbin ID (players.player_id), since names
+# repeat across base and promo cards; rows stored before IDs were kept use
+# the name as their ID. futbin shows sale times to the minute, so identical
+# sales in one minute are told apart by `seq`, their ordinal among the
+# identical rows of a fetch.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sales (
+    player_id TEXT NOT NULL,
+    player TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    sold_at TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    seq INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (player_id, platform, sold_at, price, seq)
+) WITHOUT ROWID
+"""
+SCHEMA_VERSION = 2
+# PRAGMA user_version of an older store -> rows of its `sales` table in the current column order
+MIGRATIONS = {
+    0: "SELECT player, player, platform, sold_at, price, 0 FROM sales_old",
+    1: "SELECT player, player, platform, sold_at, price, seq FROM sales_old",
+}
+
+
+def connect(file_path=SALES_HISTORY_FILE):
+    """Open the sales history store; SQLite handles locking between processes."""
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(file_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        _migrate(conn)
+    return conn
+
+def _migrate(conn):
+    """Create the store, or rebuild a `sales` table written by an older version."""
+    conn.execute("BEGIN IMMEDIATE")  # another process may be migrating the same file
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        old = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sales'").fetchone()
+        if old and version != SCHEMA_VERSION:
+            conn.execute("ALTER TABLE sales RENAME TO sales_old")
+            conn.execute(SCHEMA)
+            conn.execute(f"INSERT OR IGNORE INTO sales {MIGRATIONS[version]}")
+            conn.execute("DROP TABLE sales_old")
+        else:
+            conn.execute(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def _numbered(rows):
+    """(sold_at, price, seq) per row, seq counting identical (sold_at, price) rows so far."""
+    seen = {}
+    for sold_at, price in rows:
+        seq = seen.get((sold_at, price), 0)
+        seen[(sold_at, price)] = seq + 1
+        yield sold_at, price, seq
+
+def record_sales(player_id, player, platform, rows, file_path=SALES_HISTORY_FILE):
+    """Append (datetime, price) sales rows; rows already stored are ignored.
+
+    `rows` must be one fetch's de-duplicated rows (see
+    futbin_scraper.merge_sales_pages): the n-th identical sale of a minute
+    is stored once however many fetches saw it, and identical sales are
+    all kept.
+    """
+    if not rows:
+        return
+    with closing(connect(file_path)) as conn, conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO sales (player_id, player, platform, sold_at, price, seq) VALUES (?, ?, ?, ?, ?, ?)",
+            [(player_id, player, platform, sold_at.isoformat(), price, seq) for sold_at, price, seq in _numbered(rows)],
+        )
+
+def iter_sales(player=None, platform=None, since=None, until=None, file_path=SALES_HISTORY_FILE):
+    """Yield (player ID, name, platform, datetime, price) ordered by card, platform and time.
+
+    `player` matches a futbin ID or a display name (every card of that name).
+    """
+    clauses, params = [], []
+    if player is not None:
+        clauses.append("(player_id = ? OR player = ?)")
+        params += [player, player]
+    for column, op, value in (("platform", "=", platform), ("sold_at", ">=", since), ("sold_at", "<", until)):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(value.isoformat() if isinstance(value, datetime) else value)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    if not os.path.exists(file_path):
+        return
+    with closing(connect(file_path)) as conn:
+        for key, name, plat, sold_at, price in conn.execute(
+            f"SELECT player_id, player, platform, sold_at, price FROM sales{where} "
+            "ORDER BY player_id, platform, sold_at", params
+        ):
+            yield key, name, plat, datetime.fromisoformat(sold_at), price
@@ -0,0 +1,87 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+from .constants import DEFAULT_PLATFORM, SCAN_JOURNAL_FILE
+from .players import roster_key
+
+QUEUED, INFLIGHT, DONE, FAILED = "queued", "inflight", "done", "failed"
+
+# Jobs are keyed by the card's futbin ID (players.roster_key): promos reuse names
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    squad TEXT NOT NULL,
+    player_id TEXT NOT NULL,
+    player TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    value REAL NOT NULL,
+    pinfo TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    PRIMARY KEY (squad, player_id, platform)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS jobs_open ON jobs (state, value)
+"""
+SCHEMA_VERSION = 1
+
+
+class ScanJournal:
+    """Durable record of one scan_all run's (squad, card, platform) jobs.
+
+    Every job is written as queued before the run starts, marked in-flight
+    when its page opens and done only once its result has been merged into
+    the cache, so after a crash the queued and in-flight rows are exactly
+    the work left. Reading them back goes through the (state, value) index.
+    """
+
+    def __init__(self, file_path=SCAN_JOURNAL_FILE, platform=DEFAULT_PLATFORM):
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        self.platform = platform
+        self.conn = sqlite3.connect(file_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Only the last run is kept, so an older journal is dropped rather than migrated
+            self.conn.executescript(f"DROP TABLE IF EXISTS jobs; PRAGMA user_version = {SCHEMA_VERSION};")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _set(self, state, jobs):
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE jobs SET state = ?, updated = ? WHERE squad = ? AND player_id = ? AND platform = ?",
+                [(state, now, squad, roster_key(pinfo), self.platform) for _, squad, pinfo in jobs],
+            )
+
+    def start_run(self, jobs):
+        """Forget the previous run and queue `jobs` ((value, squad, pinfo) tuples)."""
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.execute("DELETE FROM jobs")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(squad, roster_key(pinfo), pinfo["Player"], self.platform, value, json.dumps(pinfo), QUEUED, now)
+                 for value, squad, pinfo in jobs],
+            )
+
+    def remaining(self):
+        """Queued and in-flight jobs of the last run, highest value first."""
+        rows = self.conn.execute(
+            "SELECT value, squad, pinfo FROM jobs WHERE state IN (?, ?) ORDER BY value DESC", (QUEUED, INFLIGHT)
+        )
+        return [(value, squad, json.loads(pinfo)) for value, squad, pinfo in rows]
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+
+    def started(self, job):
+        self._set(INFLIGHT, [job])
+
+    def finished(self, jobs):
+        self._set(DONE, jobs)
+
+    def failed(self, job):
+        self._set(FAILED, [job])
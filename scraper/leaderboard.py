@@ -0,0 +1,82 @@
+import heapq
+from .cache_manager import player_key
+from .utils import player_metrics, RANK_METRICS
+
+
+def top_players(players_cache, metric, k=5):
+    """The K best (squad, player) pairs for `metric` in one pass, without building a Leaderboard.
+
+    Only K candidates are held at a time; same order as `Leaderboard.top`.
+    """
+    ranked = ((value, squad, player) for squad, players in players_cache.items() for player in players
+              for value in (player_metrics(player).get(metric),) if value is not None)
+    return [(squad, player) for _, squad, player in heapq.nlargest(k, ranked, key=lambda row: row[0])]
+
+
+class Leaderboard:
+    """Cross-squad ranking of every cached player.
+
+    One max-heap per metric (see `RANK_METRICS`). An update pushes a new heap
+    entry and bumps the player's version; older entries for the same player
+    are dropped lazily when `top` walks past them. `top(metric, k)` costs
+    O(K log N) and leaves the heaps intact.
+    """
+
+    def __init__(self, metrics=RANK_METRICS):
+        self._heaps = {metric: [] for metric in metrics}
+        self._entries = {}  # (squad, player key) -> (squad, player, metrics, version)
+        self._version = 0
+
+    @classmethod
+    def from_cache(cls, players_cache):
+        board = cls()
+        for squad, players in players_cache.items():
+            for player in players:
+                board.update(squad, player)
+        return board
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, squad, player):
+        """Insert or refresh one player (O(M log N) for M metrics)."""
+        key = (squad, player_key(player))
+        self._version += 1
+        values = player_metrics(player)
+        self._entries[key] = (squad, player, values, self._version)
+        for metric, heap in self._heaps.items():
+            value = values.get(metric)
+            if value is not None:
+                heapq.heappush(heap, (-value, self._version, key))
+        self._compact()
+
+    def remove(self, squad, key):
+        self._entries.pop((squad, key), None)
+
+    def top(self, metric, k=5):
+        """Return the K best (squad, player) pairs for `metric`, highest first."""
+        if metric not in self._heaps:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {', '.join(self._heaps)}")
+        heap = self._heaps[metric]
+        kept, rows = [], []
+        while heap and len(rows) < k:
+            item = heapq.heappop(heap)
+            entry = self._entries.get(item[2])
+            if entry is None or entry[3] != item[1]:
+                continue  # superseded or removed, drop for good
+            kept.append(item)
+            rows.append((entry[0], entry[1]))
+        for item in kept:
+            heapq.heappush(heap, item)
+        return rows
+
+    def _compact(self):
+        # Keep stale entries from outgrowing the live set between top() calls
+        live = len(self._entries)
+        for metric, heap in self._heaps.items():
+            if len(heap) > 2 * live + 64:
+                self._heaps[metric] = [
+                    item for item in heap
+                    if item[2] in self._entries and self._entries[item[2]][3] == item[1]
+                ]
+                heapq.heapify(self._heaps[metric])
@@ -0,0 +1,253 @@
+"""Process metrics in the Prometheus text format.
+
+Counters, gauges and histograms below are updated by the fetch, parse,
+cache and scan code whether or not anything reads them (an update is a
+dict operation). `serve(port)` exposes them at http://127.0.0.1:PORT/metrics
+from a daemon thread; `write_periodically(path)` is the no-network
+fallback, rewriting a text file (node_exporter textfile format).
+
+    python app.py --metrics-port 9108 watch
+    curl -s localhost:9108/metrics
+"""
+import bisect
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+REGISTRY = []
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values = {} if self.label_names else {(): 0}  # label values tuple -> number
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def samples(self):
+        for key, value in list(self.values.items()):
+            yield self.name, _labels(self.label_names, key), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {_number(value)}" for name, labels, value in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time by `collect()` -> {label values tuple: value}."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def set(self, value, **labels):
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.collect:
+            self.values = dict(self.collect())
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        counts, cumulative = list(self.counts), 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _number(bound)
+            yield f"{self.name}_bucket", f'{{le="{le}"}}', cumulative
+        yield f"{self.name}_sum", "", self.sum
+        yield f"{self.name}_count", "", cumulative
+
+
+def _squad_ages():
+    """Seconds since the oldest cached player of each squad was checked."""
+    from .cache_manager import load_cache
+    from .constants import PLAYER_STATS_FILE
+    now = datetime.now()
+    ages = {}
+    for squad, players in load_cache(PLAYER_STATS_FILE).items():
+        stamps = [p["last_checked"] for p in players if p.get("last_checked")]
+        if stamps:
+            ages[(squad,)] = round((now - datetime.fromisoformat(min(stamps))).total_seconds(), 3)
+    return ages
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None where the platform has no getrusage."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KB elsewhere
+
+def _peak_rss():
+    peak = peak_rss_bytes()
+    return {(): peak} if peak is not None else {}
+
+
+PAGES_FETCHED = Counter("futbin_pages_fetched_total", "Pages loaded successfully.", ["kind"])
+FETCH_FAILURES = Counter("futbin_fetch_failures_total", "Player fetches that failed, by cause.", ["cause"])
+RETRIES = Counter("futbin_retries_total", "Failed fetches rescheduled for another attempt.")
+BYTES_DOWNLOADED = Counter("futbin_bytes_downloaded_total", "HTML bytes read from loaded pages.")
+CACHE_LOOKUPS = Counter("futbin_cache_lookups_total", "Players served from cache (hit) or due for a fetch (miss).",
+                        ["result"])
+CACHE_WRITES = Counter("futbin_cache_writes_total", "Atomic cache file writes.", ["file"])
+QUEUE_DEPTH = Gauge("futbin_queue_depth", "Player jobs waiting to start.")
+PAGES_OPEN = Gauge("futbin_pages_open", "Browser pages currently open for player fetches.")
+PAGE_POOL_SIZE = Gauge("futbin_page_pool_size", "Pages allowed open at once.")
+UNCHANGED_TABLES = Counter("futbin_unchanged_tables_total",
+                           "Player fetches whose sales table matched the cached one (parse and stats skipped).")
+PARSE_SECONDS = Histogram("futbin_parse_seconds", "Time to parse one sales page.")
+FETCH_SECONDS = Histogram("futbin_fetch_seconds", "Time to load one sales page (goto to content).")
+SQUAD_DATA_AGE = Gauge("futbin_squad_data_age_seconds", "Age of the stalest cached player per squad.", ["squad"],
+                       collect=_squad_ages)
+PEAK_RSS = Gauge("futbin_peak_rss_bytes", "Peak resident memory of the process.", collect=_peak_rss)
+STARTED = Gauge("futbin_process_start_time_seconds", "Unix time the process started.")
+STARTED.set(round(time.time(), 3))
+
+
+def render():
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# Sharded scan workers (scraper/workers.py) fetch in child processes; they
+# send the counter and histogram changes since their last report with each
+# result and the coordinator `add`s them, so its /metrics covers the scan.
+def snapshot():
+    """Counter and histogram values of this process, for `diff`."""
+    state = {}
+    for metric in REGISTRY:
+        if isinstance(metric, Counter):
+            state[metric.name] = dict(metric.values)
+        elif isinstance(metric, Histogram):
+            state[metric.name] = (list(metric.counts), metric.sum)
+    return state
+
+def diff(after, before):
+    """Changes from snapshot `before` to `after`; metrics that did not change are left out."""
+    changes = {}
+    for name, value in after.items():
+        old = before.get(name)
+        if isinstance(value, dict):
+            old = old or {}
+            change = {key: count - old.get(key, 0) for key, count in value.items() if count != old.get(key, 0)}
+        else:
+            (counts, total), (old_counts, old_total) = value, old or ([0] * len(value[0]), 0.0)
+            change = ([a - b for a, b in zip(counts, old_counts)], total - old_total) if counts != old_counts else None
+        if change:
+            changes[name] = change
+    return changes
+
+def add(changes):
+    """Add a `diff` taken in another process to this process's metrics."""
+    by_name = {metric.name: metric for metric in REGISTRY}
+    for name, change in changes.items():
+        metric = by_name.get(name)
+        if isinstance(metric, Counter):
+            for key, amount in change.items():
+                metric.values[key] = metric.values.get(key, 0) + amount
+        elif isinstance(metric, Histogram):
+            counts, total = change
+            metric.counts = [a + b for a, b in zip(metric.counts, counts)]
+            metric.sum += total
+
+
+def serve(port, host="127.0.0.1"):
+    """Expose /metrics from a daemon thread; returns the server (call shutdown() to stop)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # only when serving
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+def write_file(path):
+    """Atomically replace `path` with the current metrics."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".prom")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+def write_periodically(path, interval=15):
+    """Rewrite `path` every `interval` seconds from a daemon thread (and once more via the returned stop())."""
+    stopped = threading.Event()
+
+    def loop():
+        while not stopped.wait(interval):
+            write_file(path)
+
+    threading.Thread(target=loop, name="metrics-file", daemon=True).start()
+
+    def stop():
+        stopped.set()
+        write_file(path)
+    return stop
@@ -0,0 +1,106 @@
+"""Canonical player identity: the numeric futbin ID from `/26/player/<id>/<slug>`.
+
+Display names are not unique (a card without a title is scraped as a
+"Player N" placeholder, and promos reuse names), so cached stats entries
+carry the card's ID as "id" and `PlayerIndex` keys every player by it.
+Entries cached before IDs were recorded are matched to their roster card
+by squad and name, and fall back to the name when no roster lists them.
+"""
+import re
+
+PLAYER_URL_ID = re.compile(r"/(?:player|sales)/(\d+)")
+
+
+def player_id(url):
+    """Futbin ID (as a string) of a player or sales URL, or None."""
+    match = PLAYER_URL_ID.search(url or "")
+    return match.group(1) if match else None
+
+def _checked(entry):
+    return entry.get("last_checked") or ""
+
+def roster_key(pinfo):
+    """Index key of a roster card ({Player, URL}): its ID, or its name if the URL has none."""
+    return player_id(pinfo.get("URL")) or pinfo["Player"]
+
+
+class PlayerIndex:
+    """Every known player once, by ID: name, squads listing the card and latest stats entry.
+
+    Lookups, dedup and merges are dict operations. The same card cached
+    under several squads resolves to the newest entry (by `last_checked`).
+    """
+
+    def __init__(self):
+        self._players = {}  # key -> {"name", "squads": set, "entry"}
+        self._by_name = {}  # (squad, name) -> key (None if two cards share it), for entries cached without an ID
+
+    @classmethod
+    def from_cache(cls, players_cache, squads_cache=None):
+        index = cls()
+        for squad, info in (squads_cache or {}).items():
+            for pinfo in info.get("players", []):
+                index.add_card(squad, pinfo)
+        for squad, players in players_cache.items():
+            for player in players:
+                index.add(squad, player)
+        return index
+
+    def __len__(self):
+        return len(self._players)
+
+    def __contains__(self, key):
+        return key in self._players
+
+    def _record(self, key, squad, name):
+        record = self._players.setdefault(key, {"name": name, "squads": set(), "entry": None})
+        record["squads"].add(squad)
+        if name and not record["name"]:
+            record["name"] = name
+        if self._by_name.setdefault((squad, name), key) != key:
+            self._by_name[(squad, name)] = None  # ambiguous: leave old entries of that name unmatched
+        return record
+
+    def add_card(self, squad, pinfo):
+        """Register a roster card ({Player, URL}) of `squad`; returns its key."""
+        key = roster_key(pinfo)
+        self._record(key, squad, pinfo["Player"])
+        return key
+
+    def key_of(self, squad, entry):
+        """Key of a cached stats entry: its "id", else the roster card of that name in `squad`."""
+        return entry.get("id") or self._by_name.get((squad, entry["player"])) or entry["player"]
+
+    def add(self, squad, entry):
+        """Merge a stats entry, keeping the newest per player; returns its key."""
+        key = self.key_of(squad, entry)
+        record = self._record(key, squad, entry["player"])
+        if record["entry"] is None or _checked(entry) >= _checked(record["entry"]):
+            record["entry"] = entry
+            record["name"] = entry["player"]
+        return key
+
+    def get(self, key):
+        """{"name", "squads", "entry"} of a player, or None."""
+        return self._players.get(key)
+
+    def entry(self, key):
+        """Latest stats entry of a player, or None if it was never fetched."""
+        record = self._players.get(key)
+        return record["entry"] if record else None
+
+    def stats_for(self, pinfo):
+        """Latest stats entry of a roster card, or None."""
+        return self.entry(roster_key(pinfo))
+
+    def in_squad(self, squad):
+        """Latest stats entry of every fetched player listed in `squad`, each once."""
+        return [record["entry"] for record in self._players.values()
+                if squad in record["squads"] and record["entry"] is not None]
+
+    def items(self):
+        """(squad, key, latest entry) for every squad of every fetched player."""
+        for key, record in self._players.items():
+            if record["entry"] is not None:
+                for squad in sorted(record["squads"]):
+                    yield squad, key, record["entry"]
@@ -0,0 +1,103 @@
+"""`--profile` support: cProfile, a Perfetto timeline and tracemalloc.
+
+    python app.py --profile runs/scan scan --budget 5m
+    python app.py --profile runs/tui --profile-memory tui
+
+writes runs/scan.prof (open with `python -m pstats` or snakeviz),
+runs/scan.trace.json (load in ui.perfetto.dev or chrome://tracing: one
+row per player, showing queued -> navigating -> waiting -> parsing ->
+saved, so idle gaps between pages stand out) and, with --profile-memory,
+runs/scan.mem.txt (peak traced memory, largest allocation sites and what
+grew since start).
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from . import spans
+
+# span stage -> lifecycle phase shown as the trace event category
+PHASES = {
+    "queued": "queued", "fetch_player": "player",
+    "new_page": "navigating", "goto": "navigating",
+    "wait_for_selector": "waiting", "content": "waiting",
+    "parse": "parsing", "record_sales": "parsing", "stats": "parsing",
+    "saved": "saved",
+}
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 25
+
+
+def add_profile_args(parser):
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="PREFIX",
+                        help="write PREFIX.prof (cProfile) and PREFIX.trace.json (Perfetto timeline); default PREFIX: profile")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, also trace allocations into PREFIX.mem.txt (slower)")
+
+def trace_events(recorded, pid=None):
+    """Chrome trace events for recorded spans: one thread row per player, row 0 for everything else."""
+    pid = os.getpid() if pid is None else pid
+    rows, events = {}, []
+    for stage, start, seconds, attrs in recorded:
+        player = attrs.get("player")
+        tid = rows.setdefault(player, len(rows) + 1) if player else 0
+        events.append({"name": stage, "cat": PHASES.get(stage, "other"), "ph": "X", "pid": pid, "tid": tid,
+                       "ts": round(start * 1e6, 3), "dur": round(seconds * 1e6, 3), "args": attrs})
+    names = [(0, "scan")] + [(tid, player) for player, tid in rows.items()]
+    events += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}} for tid, name in names]
+    return events
+
+def write_trace(path, recorded):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace_events(recorded), "displayTimeUnit": "ms"}, f)
+
+def write_memory_report(path, start_snapshot):
+    import tracemalloc
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"peak traced: {peak / 1e6:.1f} MB, at exit: {current / 1e6:.1f} MB\n\n")
+        f.write(f"Largest allocation sites at exit (top {TOP_ALLOCATIONS}):\n")
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            f.write(f"  {stat}\n")
+        f.write(f"\nGrowth since start (top {TOP_ALLOCATIONS}):\n")
+        for stat in snapshot.compare_to(start_snapshot, "lineno")[:TOP_ALLOCATIONS]:
+            f.write(f"  {stat}\n")
+    return peak
+
+@contextmanager
+def profiled(prefix, memory=False):
+    """Profile the body when `prefix` is set; a no-op otherwise."""
+    if not prefix:
+        yield
+        return
+    # Imported here so plain runs do not pay for them
+    import cProfile
+    import pstats
+    import tracemalloc
+    os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+    spans.enable()
+    start_snapshot = None
+    if memory:
+        tracemalloc.start(10)
+        start_snapshot = tracemalloc.take_snapshot()
+    started = time.perf_counter()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        peak = None
+        if memory:  # before the reports below allocate anything
+            peak = write_memory_report(f"{prefix}.mem.txt", start_snapshot)
+            tracemalloc.stop()
+        profiler.dump_stats(f"{prefix}.prof")
+        write_trace(f"{prefix}.trace.json", [s for s in list(spans.spans) if s[1] >= started])
+        print(f"\n🔬 Profile: {prefix}.prof, timeline: {prefix}.trace.json")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        if peak is not None:
+            print(f"🧠 Peak traced memory {peak / 1e6:.1f} MB, allocations: {prefix}.mem.txt")
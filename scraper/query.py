@@ -0,0 +1,233 @@
+import heapq
+import math
+import operator
+import re
+from array import array
+from itertools import repeat
+from .cache_manager import load_cache, merge_cache, player_key
+from .constants import QUERIES_FILE
+from .utils import STAT_COLUMNS, to_number
+
+# Shipped defaults; entries in QUERIES_FILE override them by name
+DEFAULT_QUERIES = {
+    "affordable": "price < 100k order by margin desc limit 5",
+    "top_margin": "order by margin desc limit 5",
+}
+
+def _not_equal(a, b):
+    return a == a and a != b  # NaN != b is True; a missing value never matches
+
+_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": _not_equal,
+}
+_TOKEN = re.compile(r"\s*(?:(<=|>=|==|!=|<|>|=|\(|\))|(-?\d+(?:\.\d+)?[kKmM]?)|([A-Za-z_][A-Za-z_0-9]*))")
+
+
+class QueryError(ValueError):
+    pass
+
+
+class PlayerTable:
+    """Column-oriented snapshot of the player cache.
+
+    Every column in `STAT_COLUMNS` is converted once into an `array('d')`,
+    missing values as NaN (so they never match a comparison, negated or
+    not). Queries then run as whole-column operations instead of re-parsing
+    strings per row. `update` refreshes one player's row in place.
+    """
+
+    def __init__(self, players_cache):
+        self.rows = []  # (squad, player)
+        self.columns = {name: array("d") for name in STAT_COLUMNS}
+        self._index = {}  # (squad, player key) -> row
+        for squad, players in players_cache.items():
+            for player in players:
+                self.update(squad, player)
+
+    @classmethod
+    def from_players(cls, players, squad=""):
+        return cls({squad: players})
+
+    def __len__(self):
+        return len(self.rows)
+
+    def update(self, squad, player):
+        """Add a (squad, player) row, or overwrite the row of the same card in that squad."""
+        stats = player.get("stats", {})
+        values = [to_number(stats.get(field)) for field in STAT_COLUMNS.values()]
+        row = self._index.setdefault((squad, player_key(player)), len(self.rows))
+        if row == len(self.rows):
+            self.rows.append((squad, player))
+            for name, value in zip(self.columns, values):
+                self.columns[name].append(math.nan if value is None else value)
+        else:
+            self.rows[row] = (squad, player)
+            for name, value in zip(self.columns, values):
+                self.columns[name][row] = math.nan if value is None else value
+
+    def column(self, name):
+        if name not in self.columns:
+            raise QueryError(f"Unknown column {name!r}, expected one of {', '.join(self.columns)}")
+        return self.columns[name]
+
+
+class Query:
+    """Parsed form of `<condition> [order by <column> [asc|desc]] [limit <n>]`.
+
+    Conditions compare a column with a number (`150k`, `2.5M`, `3`) and combine
+    with `and`, `or`, `not` and parentheses, e.g.
+    `price < 150k and margin_pct > 3 and sales_24h > 20 order by margin desc limit 10`.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._tokens = self._tokenize(text)
+        self._pos = 0
+        self.where = None
+        self.order_by = None
+        self.descending = True
+        self.limit = None
+        self._parse()
+
+    # ---------------- parsing ----------------
+    @staticmethod
+    def _tokenize(text):
+        tokens, pos = [], 0
+        text = text.strip()
+        while pos < len(text):
+            match = _TOKEN.match(text, pos)
+            if not match or match.end() == pos:
+                raise QueryError(f"Unexpected input at {text[pos:]!r}")
+            symbol, number, word = match.groups()
+            if symbol:
+                tokens.append(("op", symbol))
+            elif number:
+                tokens.append(("num", to_number(number)))
+            else:
+                tokens.append(("word", word.lower()))
+            pos = match.end()
+        return tokens
+
+    def _peek(self, kind=None, value=None):
+        if self._pos >= len(self._tokens):
+            return None
+        token = self._tokens[self._pos]
+        if (kind and token[0] != kind) or (value and token[1] != value):
+            return None
+        return token
+
+    def _take(self, kind=None, value=None):
+        token = self._peek(kind, value)
+        if token is None:
+            found = self._tokens[self._pos][1] if self._pos < len(self._tokens) else "end of query"
+            raise QueryError(f"Expected {value or kind} but found {found!r}")
+        self._pos += 1
+        return token
+
+    def _parse(self):
+        if self._peek() and not self._peek("word", "order") and not self._peek("word", "limit"):
+            self.where = self._parse_or()
+        if self._peek("word", "order"):
+            self._take("word", "order")
+            self._take("word", "by")
+            self.order_by = self._take("word")[1]
+            if self.order_by not in STAT_COLUMNS:
+                raise QueryError(f"Unknown column {self.order_by!r}")
+            if self._peek("word", "asc") or self._peek("word", "desc"):
+                self.descending = self._take("word")[1] == "desc"
+        if self._peek("word", "limit"):
+            self._take("word", "limit")
+            self.limit = int(self._take("num")[1])
+        if self._peek():
+            raise QueryError(f"Unexpected {self._peek()[1]!r}")
+
+    def _parse_or(self):
+        node = self._parse_and()
+        while self._peek("word", "or"):
+            self._take()
+            node = ("or", node, self._parse_and())
+        return node
+
+    def _parse_and(self):
+        node = self._parse_not()
+        while self._peek("word", "and"):
+            self._take()
+            node = ("and", node, self._parse_not())
+        return node
+
+    def _parse_not(self):
+        if self._peek("word", "not"):
+            self._take()
+            return ("not", self._parse_not())
+        if self._peek("op", "("):
+            self._take()
+            node = self._parse_or()
+            self._take("op", ")")
+            return node
+        column = self._take("word")[1]
+        if column not in STAT_COLUMNS:
+            raise QueryError(f"Unknown column {column!r}")
+        op = self._take("op")[1]
+        if op not in _OPERATORS:
+            raise QueryError(f"Expected a comparison after {column!r}")
+        return ("cmp", column, _OPERATORS[op], self._take("num")[1])
+
+    # ---------------- evaluation ----------------
+    def mask(self, table):
+        """Boolean list, one entry per table row."""
+        if self.where is None:
+            return [True] * len(table)
+        return self._eval(self.where, table)
+
+    def _eval(self, node, table, negate=False):
+        # `not` is pushed down to the comparisons (De Morgan), so a row with
+        # a missing value fails `not price < 150k` just as it fails `price < 150k`
+        kind = node[0]
+        if kind == "cmp":
+            _, column, op, value = node
+            if negate:
+                return [v == v and not op(v, value) for v in table.column(column)]
+            return list(map(op, table.column(column), repeat(value)))
+        if kind == "not":
+            return self._eval(node[1], table, not negate)
+        combine = operator.and_ if (kind == "and") != negate else operator.or_
+        return list(map(combine, self._eval(node[1], table, negate), self._eval(node[2], table, negate)))
+
+    def run(self, table):
+        """Matching (squad, player) rows, ordered and limited as requested.
+
+        Rows with no value in the `order by` column are left out of an ordered result.
+        """
+        indices = [i for i, keep in enumerate(self.mask(table)) if keep]
+        if self.order_by:
+            values = table.column(self.order_by)
+            indices = [i for i in indices if not math.isnan(values[i])]
+            sign = -1 if self.descending else 1
+            if self.limit is not None:
+                indices = heapq.nsmallest(self.limit, indices, key=lambda i: sign * values[i])
+            else:
+                indices.sort(key=lambda i: sign * values[i])
+        if self.limit is not None:
+            indices = indices[:self.limit]
+        return [table.rows[i] for i in indices]
+
+
+def saved_queries():
+    return {**DEFAULT_QUERIES, **load_cache(QUERIES_FILE)}
+
+def save_query(name, text):
+    Query(text)  # validate before storing
+    merge_cache(QUERIES_FILE, {name: text})
+
+def resolve_query(text_or_name):
+    """Return the parsed saved query called `text_or_name`, or parse it as an expression."""
+    return Query(saved_queries().get(text_or_name, text_or_name))
+
+def run_query(text_or_name, players_cache):
+    return resolve_query(text_or_name).run(PlayerTable(players_cache))
@@ -0,0 +1,79 @@
+"""Incremental squad and roster discovery.
+
+The `/squads` listing is diffed against the squad cache: new promos are
+added, known squads keep their cached roster (and stats stamp), and only
+rosters that are missing or older than ROSTER_EXPIRY_HOURS are scraped,
+`concurrency` pages at a time.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from .cache_manager import merge_cache
+from .constants import ROSTER_EXPIRY_HOURS, SQUAD_CACHE_FILE, SQUAD_FILTER, SQUADS_URL
+
+
+def roster_due(info, now=None):
+    """True when a squad has no roster yet or its roster is older than ROSTER_EXPIRY_HOURS."""
+    if not info.get("players"):
+        return True
+    checked = info.get("roster_checked")
+    if not checked:
+        return False  # cached before rosters were stamped; keep it
+    now = now or datetime.now()
+    return now - datetime.fromisoformat(checked) > timedelta(hours=ROSTER_EXPIRY_HOURS)
+
+async def refresh_rosters(context, squads_cache, names, concurrency=4, deadline=None, log=print):
+    """Scrape the rosters of `names` in parallel and merge them into the squad cache.
+
+    `deadline` is a time.time() value after which no further roster is started;
+    progress goes to `log` (the TUI passes its own).
+    Updates `squads_cache` in place; returns the names whose roster was loaded.
+    """
+    from .futbin_scraper import scrape_squad_players
+    slots = asyncio.Semaphore(concurrency)
+
+    async def load(name):
+        async with slots:
+            if deadline and time.time() >= deadline:
+                log(f"⏹ Budget spent before the roster of {name} was loaded.")
+                return None
+            try:
+                players = await scrape_squad_players(context, squads_cache[name]["url"])
+            except Exception as e:
+                log(f"⚠️ Could not load roster for {name}: {e}")
+                return None
+            log(f"📋 Loaded roster for {name} ({len(players)} players)")
+            return name, players
+
+    loaded = [r for r in await asyncio.gather(*(load(name) for name in names)) if r]
+    if loaded:
+        checked = datetime.now().isoformat(timespec="seconds")
+        updates = {}
+        for name, players in loaded:
+            squads_cache[name].update(players=players, roster_checked=checked)
+            updates[name] = squads_cache[name]
+        merge_cache(SQUAD_CACHE_FILE, updates)
+    return [name for name, _ in loaded]
+
+async def discover_squads(context, squads_cache, squads_url=SQUADS_URL, squad_filter=SQUAD_FILTER, concurrency=4,
+                          deadline=None, log=print):
+    """Add promos new on the `/squads` page to `squads_cache` and load the rosters that are due.
+
+    Returns the names of the new squads. If the listing cannot be loaded the
+    cache is left as it was, so callers can carry on from cache.
+    """
+    from .futbin_scraper import fetch_squads
+    try:
+        listed = await fetch_squads(context, squads_url, squad_filter)
+    except Exception as e:
+        log(f"⚠️ Could not load the squad list, using the cached one: {e}")
+        listed = {}
+    new = [name for name in listed if name not in squads_cache]
+    for name in new:
+        squads_cache[name] = listed[name]
+    if new:
+        merge_cache(SQUAD_CACHE_FILE, {name: listed[name] for name in new})
+        log(f"🆕 {len(new)} new squad(s): {', '.join(new)}")
+    await refresh_rosters(context, squads_cache, [n for n, info in squads_cache.items() if roster_due(info)],
+                          concurrency, deadline, log)
+    return new
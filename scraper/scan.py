@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from . import metrics, spans
+from .cache_manager import merge_cache
+from .constants import PLAYER_STATS_FILE
+from .players import PlayerIndex, roster_key
+from .scheduler import expected_value, is_due
+from .spans import span
+from .utils import table_unchanged
+
+# Each cache write re-reads and rewrites the whole file, so pending results are
+# flushed once they add up to MERGE_FRACTION of the cache (a size-proportional
+# batch keeps total write I/O linear in the players scanned), or after
+# MERGE_INTERVAL seconds so a crash loses little work (the journal re-runs it).
+MERGE_FRACTION = 0.1
+MERGE_MIN_BYTES = 64 * 1024
+MERGE_INTERVAL = 30.0
+THROUGHPUT_SAMPLES = 500  # page completion times kept for throughput()
+
+
+def plan_jobs(squads_cache, players_cache, now=None):
+    """Due (squad, player info) jobs across every rostered squad, highest expected value first.
+
+    `players_cache` may be a PlayerIndex already built over both caches.
+    Returns (jobs, not_due) where each job is (value, squad, pinfo).
+    """
+    now = time.time() if now is None else now
+    index = players_cache if isinstance(players_cache, PlayerIndex) else PlayerIndex.from_cache(players_cache, squads_cache)
+    jobs, not_due = [], 0
+    for squad, info in squads_cache.items():
+        for pinfo in info.get("players", []):
+            player = index.stats_for(pinfo)
+            if not is_due(player, now):
+                not_due += 1
+                continue
+            jobs.append((expected_value(player, now), squad, pinfo))
+    jobs.sort(key=lambda job: job[0], reverse=True)  # stable: ties keep squad order
+    metrics.CACHE_LOOKUPS.inc(not_due, result="hit")
+    metrics.CACHE_LOOKUPS.inc(len(jobs), result="miss")
+    return jobs, not_due
+
+def known_tables(jobs, index):
+    """Cached entries (by roster key) of the jobs' players that record their sales table fingerprint."""
+    entries = ((roster_key(pinfo), index.stats_for(pinfo)) for _, _, pinfo in jobs)
+    return {key: entry for key, entry in entries if entry and entry.get("table_hash")}
+
+
+class DeadlineScan:
+    """Fetch planned jobs in order, `concurrency` pages at a time, until a deadline.
+
+    No page is started unless the average page time so far still fits before
+    the deadline; pages still open at the deadline are cancelled. Results are
+    merged into the cache in batches as they arrive, and with a `journal`
+    (see scraper/journal.py) each job is marked done once its batch is saved.
+    `pause()` stops new pages from starting until `resume()`. `previous`
+    maps roster keys to cached entries; a player whose sales table has not
+    changed since is only re-stamped (counted in `unchanged`). `concurrency`
+    caps open pages, not players: a player's extra sales pages wait for a
+    slot like any other page.
+
+    Refreshed players are only counted: their results are handed to
+    `on_result` and the cache, not kept, so memory does not grow with the
+    number of players scanned; `previous` entries are dropped as their
+    players are fetched. Results reach the cache in batches of about
+    MERGE_FRACTION of its size, or every MERGE_INTERVAL seconds.
+    """
+
+    def __init__(self, context, deadline=None, concurrency=8, on_result=None, journal=None, previous=None):
+        from .futbin_scraper import fetch_player_stats
+        self.fetch = fetch_player_stats
+        self.context = context
+        self.deadline = deadline  # time.monotonic() value, None = no limit
+        self.concurrency = concurrency
+        self.page_slots = asyncio.Semaphore(concurrency)
+        self.on_result = on_result  # called with (squad, player) for every refreshed player
+        self.journal = journal
+        self.previous = previous or {}
+        self.page_seconds = 0.0  # moving average, 0 until the first page completes
+        self.refreshed = self.unchanged = 0
+        self.failed, self.cancelled, self.skipped = [], [], []
+        self.queued, self.inflight = deque(), {}
+        self.completed_at = deque(maxlen=THROUGHPUT_SAMPLES)
+        self._pending, self._pending_jobs = {}, []
+        self._pending_bytes, self._last_flush = 0, time.monotonic()
+        self._flush_bytes = self._batch_bytes()
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+
+    @property
+    def paused(self):
+        return not self._resumed.is_set()
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def throughput(self, window=30):
+        """Pages finished per second over the last `window` seconds."""
+        now = time.monotonic()
+        recent = [t for t in self.completed_at if now - t <= window]
+        if not recent:
+            return 0.0
+        return len(recent) / max(1.0, min(window, now - recent[0]))
+
+    def can_start(self):
+        return self.deadline is None or time.monotonic() + self.page_seconds <= self.deadline
+
+    async def _fetch(self, pinfo, cutoff_time):
+        started = time.monotonic()
+        with span("fetch_player", player=pinfo["Player"]):
+            result = await self.fetch(self.context, pinfo, cutoff_time, previous=self.previous.pop(roster_key(pinfo), None),
+                                      page_slots=self.page_slots)
+        # Moving average of page time, used to stop starting pages near the deadline
+        elapsed = time.monotonic() - started
+        self.page_seconds = 0.8 * self.page_seconds + 0.2 * elapsed if self.page_seconds else elapsed
+        return result
+
+    @staticmethod
+    def _batch_bytes():
+        try:
+            size = os.path.getsize(PLAYER_STATS_FILE)
+        except OSError:
+            size = 0
+        return max(MERGE_MIN_BYTES, size * MERGE_FRACTION)
+
+    async def _flush(self):
+        self._last_flush = time.monotonic()
+        if self._pending:
+            pending, jobs = self._pending, self._pending_jobs
+            self._pending, self._pending_jobs, self._pending_bytes = {}, [], 0
+            # Off the event loop, so a large cache write does not stall pages (or the TUI)
+            started = time.perf_counter()
+            await asyncio.to_thread(merge_cache, PLAYER_STATS_FILE, pending)
+            self._flush_bytes = self._batch_bytes()
+            if spans.enabled:
+                seconds = time.perf_counter() - started
+                for job in jobs:
+                    spans.record("saved", started, seconds, {"player": job[2]["Player"]})
+            if self.journal:
+                self.journal.finished(jobs)
+
+    async def _record(self, job, result):
+        self.completed_at.append(time.monotonic())
+        if not result:
+            self.failed.append(job)
+            if self.journal:
+                self.journal.failed(job)
+            return
+        squad = job[1]
+        self.refreshed += 1
+        self.unchanged += table_unchanged(result)
+        self._pending_jobs.append(job)
+        self._pending.setdefault(squad, []).append(result)
+        self._pending_bytes += len(json.dumps(result))
+        if self.on_result:
+            self.on_result(squad, result)
+        if self._pending_bytes >= self._flush_bytes or time.monotonic() - self._last_flush >= MERGE_INTERVAL:
+            await self._flush()
+
+    async def _wait_resumed(self):
+        """Block while paused; False if the deadline passes first."""
+        timeout = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(self._resumed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def run(self, jobs):
+        cutoff_time = datetime.now() - timedelta(hours=24)
+        queued, inflight = self.queued, self.inflight
+        queued.extend(jobs)
+        queued_at = time.perf_counter()
+        metrics.PAGE_POOL_SIZE.set(self.concurrency)
+        try:
+            while queued or inflight:
+                if self.paused and not inflight and not await self._wait_resumed():
+                    break
+                while queued and not self.paused and len(inflight) < self.concurrency and self.can_start():
+                    job = queued.popleft()
+                    if self.journal:
+                        self.journal.started(job)
+                    if spans.enabled:
+                        spans.record("queued", queued_at, time.perf_counter() - queued_at, {"player": job[2]["Player"]})
+                    inflight[asyncio.create_task(self._fetch(job[2], cutoff_time))] = job
+                metrics.QUEUE_DEPTH.set(len(queued))
+                if not inflight:
+                    if self.paused:
+                        continue
+                    break
+                timeout = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+                done, _ = await asyncio.wait(inflight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    job = inflight.pop(task)
+                    await self._record(job, None if task.exception() else task.result())
+                if not done:
+                    # Deadline reached with pages still open
+                    await self._cancel_inflight()
+        finally:
+            # Also runs when the scan itself is cancelled (Ctrl-C, TUI stop)
+            await self._cancel_inflight()
+            self.skipped = list(queued)
+            metrics.QUEUE_DEPTH.set(0)
+            await self._flush()
+        return self
+
+    async def _cancel_inflight(self):
+        for task in self.inflight:
+            task.cancel()
+        await asyncio.gather(*self.inflight, return_exceptions=True)
+        self.cancelled.extend(self.inflight.values())
+        self.inflight.clear()
+
+    def unfinished_squads(self):
+        return {job[1] for job in self.failed + self.cancelled + self.skipped}
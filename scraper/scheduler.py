@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from .constants import MAX_REFRESH_MINUTES, MIN_REFRESH_MINUTES, SQUAD_EXPIRY_MINUTES
+from .utils import player_metrics
+
+# A card selling this often per day, or moving this much (stdev % of trend),
+# each halve the refresh interval relative to MAX_REFRESH_MINUTES.
+REFERENCE_SALES_24H = 24
+REFERENCE_VOLATILITY_PCT = 5
+
+
+def refresh_interval(player):
+    """Minutes before a cached player is worth fetching again.
+
+    Liquid (many sales) and volatile (high price stdev) cards come back
+    sooner, illiquid stable ones later, within MIN/MAX_REFRESH_MINUTES.
+    Players cached before velocity was recorded use SQUAD_EXPIRY_MINUTES.
+    """
+    metrics = player_metrics(player)
+    sales, volatility = metrics["sales_24h"], metrics["volatility_pct"]
+    if sales is None:
+        return SQUAD_EXPIRY_MINUTES
+    pressure = 1 + sales / REFERENCE_SALES_24H + (volatility or 0) / REFERENCE_VOLATILITY_PCT
+    return min(MAX_REFRESH_MINUTES, max(MIN_REFRESH_MINUTES, MAX_REFRESH_MINUTES / pressure))
+
+def next_refresh(player):
+    """Epoch seconds at which `player` falls due (0, always due, if never checked)."""
+    last_checked = player.get("last_checked") if player else None
+    if not last_checked:
+        return 0.0
+    return datetime.fromisoformat(last_checked).timestamp() + refresh_interval(player) * 60
+
+def is_due(player, now=None):
+    return next_refresh(player) <= (time.time() if now is None else now)
+
+def expected_value(player, now=None):
+    """Refresh priority of a cached player: price × margin × staleness.
+
+    Staleness is the time since the last check over the player's refresh
+    interval, so a long-overdue card outranks one that only just fell due.
+    Cards without a positive price and margin (or never fetched) score 0.
+    """
+    if not player:
+        return 0.0
+    metrics = player_metrics(player)
+    price, margin = metrics["price"] or 0, metrics["margin"] or 0
+    if price <= 0 or margin <= 0:
+        return 0.0
+    last_checked = player.get("last_checked")
+    if not last_checked:
+        return float(price * margin)
+    age = (time.time() if now is None else now) - datetime.fromisoformat(last_checked).timestamp()
+    return price * margin * max(0.0, age / (refresh_interval(player) * 60))
+
+
+class PageBudget:
+    """Token bucket capping page loads at `pages_per_minute` (bursts up to `burst`)."""
+
+    def __init__(self, pages_per_minute, burst=None):
+        self.rate = pages_per_minute / 60
+        self.capacity = burst or max(1, pages_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ByteBudget:
+    """Caps bytes held at once: `reserve(n)` waits until n more fit under `capacity`.
+
+    A single reservation larger than the capacity is clipped to it, so an
+    oversized page still goes through, just on its own.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.used = 0
+        self._released = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes):
+        nbytes = min(int(nbytes), self.capacity)
+        async with self._released:
+            await self._released.wait_for(lambda: self.used + nbytes <= self.capacity)
+            self.used += nbytes
+        try:
+            yield
+        finally:
+            async with self._released:
+                self.used -= nbytes
+                self._released.notify_all()
+
+
+class RefreshScheduler:
+    """Priority queue of jobs ordered by when they are next due (epoch seconds).
+
+    Rescheduling a job replaces its previous slot; stale heap entries are
+    skipped when they reach the top.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}  # job key -> due time of its live heap entry
+        self._jobs = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, key):
+        return key in self._due
+
+    def keys(self):
+        return list(self._due)
+
+    def schedule(self, key, job, due):
+        self._due[key] = due
+        self._jobs[key] = job
+        heapq.heappush(self._heap, (due, next(self._counter), key))
+
+    def discard(self, key):
+        self._due.pop(key, None)
+        self._jobs.pop(key, None)
+
+    def _prune(self):
+        while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def next_due(self):
+        """Due time of the earliest job, or None when empty."""
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """Remove and return (key, job) of the earliest job if it is due, else None."""
+        self._prune()
+        now = time.time() if now is None else now
+        if not self._heap or self._heap[0][0] > now:
+            return None
+        _, _, key = heapq.heappop(self._heap)
+        self._due.pop(key)
+        return key, self._jobs.pop(key)
@@ -0,0 +1,118 @@
+"""Per-stage latency spans and per-player outcomes for the scrape pipeline.
+
+    with span("goto", player=name):
+        await page.goto(url)
+
+Off by default: `span()` then returns one shared no-op context manager, so
+instrumented code costs a function call and a flag check. `enable()` turns
+recording on for the process; `report()` prints p50/p95/p99 per stage and
+`close()` writes the summary line to the JSONL file, if any.
+"""
+import json
+import math
+import time
+from collections import deque
+from contextlib import nullcontext
+
+_NOOP = nullcontext()
+
+MAX_KEPT = 100_000  # spans/outcomes kept in memory for the report (long-running watch)
+
+enabled = False
+spans = deque(maxlen=MAX_KEPT)     # (stage, start perf_counter, seconds, attrs)
+outcomes = deque(maxlen=MAX_KEPT)  # (player, outcome, attrs)
+_jsonl = None
+_epoch = time.time() - time.perf_counter()  # perf_counter -> epoch seconds
+
+
+class _Span:
+    __slots__ = ("stage", "attrs", "start")
+
+    def __init__(self, stage, attrs):
+        self.stage = stage
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        record(self.stage, self.start, seconds, self.attrs)
+        return False
+
+
+def enable(jsonl_path=None):
+    """Start recording; with `jsonl_path`, also append every span and outcome there as JSON lines."""
+    global enabled, _jsonl
+    enabled = True
+    if jsonl_path and _jsonl is None:
+        _jsonl = open(jsonl_path, "a", encoding="utf-8")
+
+def span(stage, **attrs):
+    if not enabled:
+        return _NOOP
+    return _Span(stage, attrs)
+
+def record(stage, start, seconds, attrs):
+    spans.append((stage, start, seconds, attrs))
+    if _jsonl:
+        _jsonl.write(json.dumps({"type": "span", "stage": stage, "start": round(_epoch + start, 6),
+                                 "ms": round(seconds * 1000, 3), **attrs}) + "\n")
+
+def outcome(player, result, **attrs):
+    """Final state of one player fetch: "ok", "unchanged", "no_sales", "error" (attrs say why)."""
+    if not enabled:
+        return
+    outcomes.append((player, result, attrs))
+    if _jsonl:
+        _jsonl.write(json.dumps({"type": "outcome", "player": player, "outcome": result, **attrs}) + "\n")
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))]
+
+def summary():
+    """{stage: {count, p50, p95, p99, total}} in milliseconds, stages in first-seen order."""
+    per_stage = {}
+    for stage, _, seconds, _ in spans:
+        per_stage.setdefault(stage, []).append(seconds * 1000)
+    result = {}
+    for stage, values in per_stage.items():
+        values.sort()
+        result[stage] = {"count": len(values), "total": round(sum(values), 3),
+                         **{f"p{q}": round(percentile(values, q), 3) for q in (50, 95, 99)}}
+    return result
+
+def outcome_counts():
+    counts, errors = {}, {}
+    for _, result, attrs in outcomes:
+        counts[result] = counts.get(result, 0) + 1
+        if "error" in attrs:
+            errors[attrs["error"]] = errors.get(attrs["error"], 0) + 1
+    return counts, errors
+
+def report():
+    if not enabled or not spans:
+        return
+    print(f"\n⏱ Stage timings (ms)\n{'stage':<20} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'total':>11}")
+    for stage, s in summary().items():
+        print(f"{stage:<20} {s['count']:>7} {s['p50']:>9.1f} {s['p95']:>9.1f} {s['p99']:>9.1f} {s['total']:>11.1f}")
+    counts, errors = outcome_counts()
+    if counts:
+        detail = f" ({', '.join(f'{k} {v}' for k, v in sorted(errors.items()))})" if errors else ""
+        print("🎯 Player outcomes: " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())) + detail)
+
+def close():
+    """Write the summary line and close the JSONL file."""
+    global _jsonl
+    if _jsonl:
+        counts, errors = outcome_counts()
+        _jsonl.write(json.dumps({"type": "summary", "stages": summary(), "outcomes": counts, "errors": errors}) + "\n")
+        _jsonl.close()
+        _jsonl = None
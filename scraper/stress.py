@@ -0,0 +1,140 @@
+"""Multi-process checks: many cache writers lose no entries, and a sharded
+scan survives a worker crash.
+
+    python app.py stress                           # 8 processes x 50 merges
+    python app.py stress --processes 16 --merges 200 --squads 3
+    python app.py stress --crash                   # sharded scan with a worker that dies
+
+Every process calls merge_cache `--merges` times on one shared file, the
+way sharded workers, `watch` and the TUI do. Each call adds one new player
+to a squad list shared with the other writers (the per-player merge) and
+bumps the writer's own counter entry (the per-key merge). Afterwards every
+player must be in the file exactly once and every counter must hold its
+last value; the command exits with status 1 otherwise.
+
+With --crash, a ShardedScan runs stand-in workers (no browser). Two of
+them exit with status 1 holding a job while the coordinator is still busy
+with their earlier results: worker 0 after reporting the job taken,
+worker 1 before. The scan must finish, keep every result that arrived and
+count exactly the two unreported jobs as failed.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from .cache_manager import load_cache, merge_cache, player_key, stamp
+from .workers import DONE, PLAYER, TAKEN, ShardedScan
+
+CRASH_AFTER = 3  # results workers 0 and 1 report before dying in --crash
+
+
+def _writer(path, writer, merges, squads):
+    for i in range(merges):
+        merge_cache(path, {
+            f"Squad {i % squads}": [stamp({"id": f"{writer}-{i}", "player": f"Writer {writer} #{i}", "stats": {}})],
+            f"writer {writer}": stamp({"count": i + 1}),
+        })
+
+def run(path, processes=8, merges=50, squads=3):
+    """Run the writers against `path`; returns (lost player keys, counters that are off, seconds)."""
+    ctx = mp.get_context("spawn")
+    started = time.perf_counter()
+    procs = [ctx.Process(target=_writer, args=(path, w, merges, squads)) for w in range(processes)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    seconds = time.perf_counter() - started
+    if any(proc.exitcode for proc in procs):
+        raise RuntimeError(f"{sum(1 for proc in procs if proc.exitcode)} writer process(es) failed")
+
+    cache = load_cache(path)
+    seen = [player_key(p) for key, players in cache.items() if key.startswith("Squad ") for p in players]
+    expected = {f"{w}-{i}" for w in range(processes) for i in range(merges)}
+    lost = sorted(expected - set(seen))
+    if len(seen) != len(set(seen)):
+        lost.append(f"{len(seen) - len(set(seen))} duplicate(s)")
+    counters = {f"writer {w}": cache.get(f"writer {w}", {}).get("count") for w in range(processes)}
+    off = {key: count for key, count in counters.items() if count != merges}
+    return lost, off, seconds
+
+
+def _crashing_worker(worker_id, jobs, results, *_):
+    """ShardedScan worker stand-in: reports a result per job, but workers 0 and 1 die holding one."""
+    reported = 0
+    while (job := jobs.get()) is not None:
+        job_id, _, squad, pinfo = job
+        if worker_id == 1 and reported == CRASH_AFTER:
+            _die(results)  # the coordinator never learns which job was taken
+        results.put((TAKEN, worker_id, job_id, None, None, None))
+        if worker_id == 0 and reported == CRASH_AFTER:
+            _die(results)
+        time.sleep(0.01)
+        entry = stamp({"id": pinfo["URL"], "player": pinfo["Player"], "stats": {}})
+        results.put((PLAYER, worker_id, job_id, squad, pinfo, entry))
+        reported += 1
+    results.put((DONE, worker_id, None, None, None, None))
+
+def _die(results):
+    results.close()
+    results.join_thread()  # what was sent is delivered; the job in hand never is
+    os._exit(1)
+
+def run_crash(path, workers=4, players=60):
+    """Sharded scan with a crashing worker; returns (problems, scan stats, seconds)."""
+    roster = [{"Player": f"Player {i}", "URL": str(i)} for i in range(players)]
+    # A slow on_result lets the dead worker's messages queue up behind the crash
+    scan = ShardedScan(workers, on_result=lambda squad, result: time.sleep(0.02),
+                       target=_crashing_worker, stats_file=path)
+    started = time.perf_counter()
+    stats = scan.run({"Squad 0": {"url": "", "players": roster}})
+    seconds = time.perf_counter() - started
+    cached = len(load_cache(path).get("Squad 0", []))
+    problems = []
+    if stats["failed"] != 2:
+        problems.append(f"{stats['failed']} job(s) counted as failed, expected 2")
+    if stats["fetched"] + stats["failed"] != players:
+        problems.append(f"{stats['fetched']} fetched + {stats['failed']} failed != {players} jobs")
+    if cached != stats["fetched"]:
+        problems.append(f"{cached} players cached, {stats['fetched']} fetched")
+    return problems, stats, seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="stress", description="Concurrent merge_cache writers; fails if any entry is lost.")
+    parser.add_argument("--processes", "-n", type=int, default=8)
+    parser.add_argument("--merges", "-m", type=int, default=50, help="merge_cache calls per process")
+    parser.add_argument("--squads", type=int, default=3, help="squad lists the writers share")
+    parser.add_argument("--file", help="cache file to write (default: a temporary file)")
+    parser.add_argument("--crash", action="store_true", help="check a sharded scan with a worker that dies instead")
+    args = parser.parse_args(argv)
+
+    if args.crash:
+        with tempfile.TemporaryDirectory(prefix="futbin-stress-") as tmp_dir:
+            print(f"💥 Sharded scan of 60 players on 4 workers, workers 0 and 1 die after {CRASH_AFTER} results")
+            problems, stats, seconds = run_crash(args.file or os.path.join(tmp_dir, "players.json"))
+        print(f"⏱ {stats['fetched']} fetched, {stats['failed']} failed in {seconds:.2f}s")
+        if problems:
+            print("❌ " + "; ".join(problems))
+            sys.exit(1)
+        print("✅ Scan finished with every delivered result kept")
+        return
+
+    with tempfile.TemporaryDirectory(prefix="futbin-stress-") as tmp_dir:
+        path = args.file or os.path.join(tmp_dir, "players.json")
+        print(f"🔨 {args.processes} processes x {args.merges} merges into {path}")
+        lost, off, seconds = run(path, args.processes, args.merges, args.squads)
+    total = args.processes * args.merges
+    print(f"⏱ {total} merges in {seconds:.2f}s ({total / seconds:.0f}/s)")
+    if lost or off:
+        if lost:
+            print(f"❌ {len(lost)} player(s) lost: {', '.join(lost[:10])}")
+        if off:
+            print(f"❌ {len(off)} counter(s) wrong: {', '.join(f'{k}={v}' for k, v in list(off.items())[:10])}")
+        sys.exit(1)
+    print(f"✅ All {total} players and {args.processes} counters present")
+
+if __name__ == "__main__":
+    main()
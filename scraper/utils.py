@@ -1,5 +1,7 @@
 import re
 from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+from .constants import BASE_URL
 
 def parse_numeric_price(s: str):
     if not s or s.strip() in ("", "--", "0"):
@@ -12,6 +14,49 @@ def parse_numeric_price(s: str):
     digits = re.sub(r"[^\d]", "", s)
     return int(digits) if digits else None
 
+def mk_to_int(s):
+    """Convert a cached stat like '35K', '4M' or '-13123' to an int (0 if missing)."""
+    value = to_number(s)
+    return int(value) if value is not None else 0
+
+def to_number(value):
+    """Like `mk_to_int` but keeps floats and returns None for missing values."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    s = str(value).upper().replace(",", "").strip()
+    multiplier = 1
+    if s.endswith("M"):
+        multiplier, s = 1_000_000, s[:-1]
+    elif s.endswith("K"):
+        multiplier, s = 1000, s[:-1]
+    try:
+        number = float(s) * multiplier
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+# Ranking/filter column name -> key in a cached player's "stats"
+STAT_COLUMNS = {
+    "price": "trend_value",
+    "margin": "profit_margin",
+    "margin_pct": "profit_margin_pct",
+    "trend_pct": "trend_pct",
+    "sales_24h": "sales_24h",
+    "volatility_pct": "volatility_pct",
+    "highest": "highest",
+    "lowest": "lowest",
+    "avg_below": "avg_below_trend",
+    "avg_above": "avg_above_trend",
+}
+RANK_METRICS = ("margin", "margin_pct", "trend_pct", "price")
+
+def player_metrics(player):
+    """Numeric view of a cached player's stats, keyed by `STAT_COLUMNS`."""
+    stats = player.get("stats", {})
+    return {name: to_number(stats.get(field)) for name, field in STAT_COLUMNS.items()}
+
 def format_mk(value):
     if not value:
         return None
@@ -21,6 +66,19 @@ def format_mk(value):
         return f"{round(value/1000)}K"
     return str(value)
 
+def parse_duration(text):
+    """Seconds in a duration like '90s', '5m' or '1.5h' (bare numbers are minutes)."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", str(text).lower())
+    if not match:
+        raise ValueError(f"invalid duration: {text!r}")
+    return float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "": 60}[match.group(2)]
+
+def rebase_url(url, base_url=None):
+    """Swap the scheme/host of a cached futbin URL for BASE_URL (FUTBIN_BASE_URL)."""
+    base = urlsplit(base_url or BASE_URL)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
 def parse_futbin_datetime(date_str: str):
     try:
         dt = datetime.strptime(date_str.strip(), "%b %d, %I:%M %p")
@@ -30,32 +88,17 @@ def parse_futbin_datetime(date_str: str):
         return None
     
 
+def table_unchanged(entry):
+    """True if a fetched entry was only re-stamped because its sales table had not changed."""
+    return bool(entry) and entry.get("table_changed", entry.get("last_checked")) != entry.get("last_checked")
+
 def format_top5_by_profit(players, value):
     text = []
-    filtered = ""
-    filtered = [ p for p in players if p.get("stats", {},).get("profit_margin")]
-
-    if value is None:
-
-        sorted_players = sorted(
-            filtered,
-            key=lambda p: parse_numeric_price(p["stats"]["profit_margin"]),
-            reverse=True
-        )[:5]
-    else:
-
-        filtered = [
-            p for p in players if p.get("stats", {},).get("profit_margin")
-            if parse_numeric_price(p["stats"]["trend_value"]) < 100_000
-            ]
-        
-        sorted_players = sorted(
-            filtered,
-            key=lambda p: parse_numeric_price(p["stats"]["profit_margin"]),
-            reverse=True
-
-        )[:5]
-        
+    # Filtering and ranking come from the saved queries (see scraper/query.py)
+    from .query import PlayerTable, resolve_query
+    query = resolve_query("top_margin" if value is None else "affordable")
+    sorted_players = [p for _, p in query.run(PlayerTable.from_players(players))]
+
     # Pretty print output
     for idx, player in enumerate(sorted_players, 1):
         stats = player["stats"]
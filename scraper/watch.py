@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import signal
+import time
+from datetime import datetime, timedelta
+from . import metrics
+from .cache_manager import load_cache, merge_cache
+from .constants import BROWSER_CONTEXTS, PLAYER_STATS_FILE, SQUAD_CACHE_FILE, WATCH_CONFIG_FILE
+from .contexts import ContextPool
+from .profiling import add_profile_args, profiled
+from .futbin_scraper import fetch_player_stats
+from .players import PlayerIndex, roster_key
+from .rosters import refresh_rosters, roster_due
+from .scheduler import PageBudget, RefreshScheduler, next_refresh, refresh_interval
+from .utils import table_unchanged
+from .watchlist import Watchlist
+
+DEFAULT_WATCH_CONFIG = {
+    "pages_per_minute": 30,   # global page budget
+    "concurrency": 4,         # pages open at once
+    "contexts": BROWSER_CONTEXTS,  # isolated browser sessions the pages are spread over
+    "retry_minutes": 5,       # after a failed fetch
+    "squads": [],             # squad names to watch, empty = every cached squad
+}
+
+
+class WatchDaemon:
+    """Long-running refresher: one browser, players refreshed as they fall due.
+
+    SIGTERM/SIGINT stop scheduling new pages and drain the ones in flight;
+    SIGHUP reloads the config file and the squad rosters.
+    """
+
+    def __init__(self, config_file=WATCH_CONFIG_FILE):
+        self.config_file = config_file
+        self.scheduler = RefreshScheduler()
+        self.watchlist = Watchlist.from_file()
+        self.inflight = set()
+        self.inflight_keys = set()
+        self.wanted = set()
+        self.stopping = False
+        self.reload_requested = False
+        self.stats = {"refreshed": 0, "unchanged": 0, "failed": 0}
+        self.latest = {}  # roster key -> newest entry with a sales table fingerprint
+        self._wake = asyncio.Event()
+
+    # ---------------- config / jobs ----------------
+    def load_config(self):
+        self.config = {**DEFAULT_WATCH_CONFIG, **load_cache(self.config_file)}
+        self.budget = PageBudget(self.config["pages_per_minute"])
+        self.slots = asyncio.Semaphore(self.config["concurrency"])
+        metrics.PAGE_POOL_SIZE.set(self.config["concurrency"])
+
+    def watched_squads(self):
+        squads = load_cache(SQUAD_CACHE_FILE)
+        wanted = self.config["squads"]
+        return {name: info for name, info in squads.items() if not wanted or name in wanted}
+
+    def load_jobs(self):
+        """Schedule every rostered player of the watched squads, due per `refresh_interval`."""
+        squads = self.watched_squads()
+        index = PlayerIndex.from_cache(load_cache(PLAYER_STATS_FILE), squads)
+        keep = set()
+        for squad, info in squads.items():
+            for pinfo in info.get("players", []):
+                key = (squad, roster_key(pinfo))
+                keep.add(key)
+                if key not in self.scheduler and key not in self.inflight_keys:
+                    cached = index.stats_for(pinfo)
+                    if cached and cached.get("table_hash"):
+                        self.latest.setdefault(key[1], cached)
+                    due_at = next_refresh(cached)
+                    metrics.CACHE_LOOKUPS.inc(result="hit" if due_at > time.time() else "miss")
+                    self.scheduler.schedule(key, pinfo, due_at)
+        for key in [k for k in self.scheduler.keys() if k not in keep]:
+            self.scheduler.discard(key)
+        self.wanted = keep
+        metrics.QUEUE_DEPTH.set(len(self.scheduler))
+
+    # ---------------- signals ----------------
+    def stop(self):
+        self.stopping = True
+        self._wake.set()
+
+    def request_reload(self):
+        self.reload_requested = True
+        self._wake.set()
+
+    def _install_signals(self, loop):
+        handlers = [("SIGTERM", self.stop), ("SIGINT", self.stop), ("SIGHUP", self.request_reload)]
+        for name, handler in handlers:
+            if hasattr(signal, name):
+                try:
+                    loop.add_signal_handler(getattr(signal, name), handler)
+                except NotImplementedError:  # Windows event loops
+                    pass
+
+    # ---------------- main loop ----------------
+    async def discover_rosters(self, context):
+        """Scrape rosters of watched squads that have none cached yet or an expired one."""
+        squads = self.watched_squads()
+        for squad, info in squads.items():
+            if not roster_due(info) or self.stopping:
+                continue
+            await self.budget.acquire()
+            await refresh_rosters(context, squads, [squad])
+
+    async def refresh(self, context, key, pinfo, slots):
+        squad, name = key[0], pinfo["Player"]
+        self.inflight_keys.add(key)
+        try:
+            result = await fetch_player_stats(context, pinfo, datetime.now() - timedelta(hours=24),
+                                              page_budget=self.budget, previous=self.latest.get(key[1]))
+        except Exception:
+            result = None
+        finally:
+            slots.release()
+            self.inflight_keys.discard(key)
+
+        if result:
+            merge_cache(PLAYER_STATS_FILE, {squad: [result]})
+            self.watchlist.evaluate([(squad, result)])
+            self.stats["refreshed"] += 1
+            self.latest[key[1]] = result
+            delay = refresh_interval(result)
+            if table_unchanged(result):
+                self.stats["unchanged"] += 1
+                print(f"♻️ {name} ({squad}) — sales unchanged, next in {delay:.0f}m")
+            else:
+                print(f"🔄 {name} ({squad}) — trend {result['stats']['trend_value']}, "
+                      f"margin {result['stats']['profit_margin']}, next in {delay:.0f}m")
+        else:
+            self.stats["failed"] += 1
+            print(f"⚠️ {name} ({squad}) fetch failed, retrying in {self.config['retry_minutes']}m")
+            delay = self.config["retry_minutes"]
+            metrics.RETRIES.inc()
+        if not self.stopping and key in self.wanted:
+            self.scheduler.schedule(key, pinfo, time.time() + delay * 60)
+            self._wake.set()
+        metrics.QUEUE_DEPTH.set(len(self.scheduler))
+
+    async def run(self):
+        from playwright.async_api import async_playwright
+
+        self._install_signals(asyncio.get_running_loop())
+        self.load_config()
+        async with async_playwright() as p:
+            browser = await p.firefox.launch(headless=True)
+            context = await ContextPool.create(browser, self.config["contexts"])
+            await self.discover_rosters(context)
+            self.load_jobs()
+            print(f"👀 Watching {len(self.scheduler)} players "
+                  f"({self.config['pages_per_minute']} pages/min, {self.config['concurrency']} at once)")
+
+            while not self.stopping:
+                if self.reload_requested:
+                    self.reload_requested = False
+                    print("♻️ Reloading config and rosters")
+                    self.load_config()
+                    await self.discover_rosters(context)
+                    self.load_jobs()
+                    continue
+
+                due = self.scheduler.next_due()
+                delay = 60 if due is None else due - time.time()
+                if delay > 0:
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                slots = self.slots
+                await slots.acquire()
+                await self.budget.acquire()
+                item = None if self.stopping else self.scheduler.pop_due()
+                if item is None:
+                    slots.release()
+                    continue
+                metrics.QUEUE_DEPTH.set(len(self.scheduler))
+                task = asyncio.create_task(self.refresh(context, *item, slots))
+                self.inflight.add(task)
+                task.add_done_callback(self.inflight.discard)
+
+            if self.inflight:
+                print(f"⏳ Draining {len(self.inflight)} in-flight page(s)...")
+                await asyncio.gather(*self.inflight, return_exceptions=True)
+            await browser.close()
+        refreshed, unchanged = self.stats["refreshed"], self.stats["unchanged"]
+        skipped = f" ({unchanged} unchanged, {unchanged / refreshed:.0%} skipped parsing)" if refreshed else ""
+        print(f"👋 Watch stopped: {refreshed} refreshed{skipped}, {self.stats['failed']} failed.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="watch", description="Keep cached player stats fresh until stopped. "
+                                     "Set FUTBIN_BASE_URL to run against a local fixture server.")
+    parser.add_argument("--config", default=WATCH_CONFIG_FILE, help="JSON config (see DEFAULT_WATCH_CONFIG)")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    with profiled(args.profile, args.profile_memory):
+        asyncio.run(WatchDaemon(args.config).run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from .cache_manager import load_cache, merge_cache, player_key, stamp
+from .constants import ALERTS_FILE, WATCHLIST_FILE, WATCHLIST_STATE_FILE
+from .utils import STAT_COLUMNS, format_mk, player_metrics, to_number
+
+DEFAULT_COOLDOWN_MINUTES = 60
+ANY_PLAYER = "*"
+DEFAULT_SINKS = ("stdout", "jsonl")
+
+
+class Rule:
+    """One watch condition, e.g. price below 70K or margin_pct above 5.
+
+    `op` is "below", "above" or "crosses" (either direction, compared with the
+    value seen at the previous evaluation).
+    """
+
+    OPS = ("below", "above", "crosses")
+
+    def __init__(self, player, metric, op, value, cooldown_minutes=DEFAULT_COOLDOWN_MINUTES):
+        if metric not in STAT_COLUMNS:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {', '.join(STAT_COLUMNS)}")
+        if op not in self.OPS:
+            raise ValueError(f"Unknown rule op {op!r}, expected one of {', '.join(self.OPS)}")
+        number = to_number(value)  # config values may be written "70K" or "1.2M"
+        if number is None:
+            raise ValueError(f"Invalid rule value {value!r} for {player} {metric}")
+        self.player = player
+        self.metric = metric
+        self.op = op
+        self.value = number
+        self.cooldown = timedelta(minutes=cooldown_minutes)
+
+    @property
+    def id(self):
+        return f"{self.player}|{self.metric}|{self.op}|{self.value}"
+
+    def is_met(self, current, previous):
+        if current is None:
+            return False
+        if self.op == "below":
+            return current < self.value
+        if self.op == "above":
+            return current > self.value
+        return previous is not None and (previous < self.value) != (current < self.value)
+
+    def describe(self, current):
+        shown = format_mk(current) if self.metric in ("price", "margin", "highest", "lowest") else current
+        return f"{self.metric} {self.op} {self.value} (now {shown})"
+
+
+class Watchlist:
+    """Rules indexed by player so only the rules of refreshed players are checked.
+
+    `evaluate` costs O(rules of the changed players), not rules x players.
+    Alerts are edge-triggered (a rule fires when its condition becomes true,
+    not on every refresh while it stays true) and rate limited per rule by
+    its cooldown. Rule state is kept in WATCHLIST_STATE_FILE between runs.
+    """
+
+    def __init__(self, rules=(), sinks=(), state_file=WATCHLIST_STATE_FILE):
+        self.sinks = list(sinks)
+        self.state_file = state_file
+        self.state = load_cache(state_file) if state_file else {}
+        self._by_player = {}
+        for rule in rules:
+            self.add(rule)
+
+    @classmethod
+    def from_file(cls, file_path=WATCHLIST_FILE, sinks=None, state_file=WATCHLIST_STATE_FILE):
+        """Load `{"rules": [{"player", "metric", "op", "value", "cooldown_minutes"}], "sinks": [...]}`."""
+        config = load_cache(file_path)
+        rules = [Rule(**rule) for rule in config.get("rules", [])]
+        if sinks is None:
+            sinks = [make_sink(name) for name in config.get("sinks", DEFAULT_SINKS)]
+        return cls(rules, sinks, state_file)
+
+    def __len__(self):
+        return sum(len(rules) for rules in self._by_player.values())
+
+    def add(self, rule):
+        self._by_player.setdefault(rule.player, []).append(rule)
+
+    def evaluate(self, changed):
+        """Check the rules of each changed (squad, player) and dispatch alerts."""
+        alerts, checked = [], {}
+        now = datetime.now()
+        for squad, player in changed:
+            # Rules name a player by display name or futbin ID
+            rules = self._by_player.get(player["player"], []) + self._by_player.get(ANY_PLAYER, [])
+            if player.get("id"):
+                rules += self._by_player.get(player["id"], [])
+            if not rules:
+                continue
+            metrics = player_metrics(player)
+            for rule in rules:
+                state_id = rule.id if rule.player != ANY_PLAYER else f"{rule.id}|{player_key(player)}"
+                alert = self._check(rule, state_id, squad, player, metrics.get(rule.metric), now)
+                checked[state_id] = self.state[state_id]
+                if alert:
+                    alerts.append(alert)
+        for alert in alerts:
+            for sink in self.sinks:
+                sink.send(alert)
+        if self.state_file and checked:
+            # Only the states checked here, merged per rule: a TUI, scan and
+            # watch sharing the file keep each other's cooldowns and edges
+            self.state = merge_cache(self.state_file, checked)
+        return alerts
+
+    def _check(self, rule, state_id, squad, player, current, now):
+        state = stamp(self.state.setdefault(state_id, {}))
+        met = rule.is_met(current, state.get("value"))
+        was_met = state.get("met", False)
+        state["value"], state["met"] = current, met
+        if not met or (was_met and rule.op != "crosses"):
+            return None
+        fired_at = state.get("fired_at")
+        if fired_at and now - datetime.fromisoformat(fired_at) < rule.cooldown:
+            return None
+        state["fired_at"] = now.isoformat()
+        return {
+            "time": now.isoformat(),
+            "player": player["player"],
+            "squad": squad,
+            "rule": rule.id,
+            "metric": rule.metric,
+            "value": current,
+            "message": f"{player['player']} ({squad}): {rule.describe(current)}",
+        }
+
+
+# ---------------- SINKS ----------------
+class StdoutSink:
+    def send(self, alert):
+        print(f"🔔 {alert['message']}")
+
+
+class JsonlSink:
+    def __init__(self, file_path=ALERTS_FILE):
+        self.file_path = file_path
+
+    def send(self, alert):
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(alert) + "\n")
+
+
+class DesktopSink:
+    """Desktop notification via notify-send (Linux) or osascript (macOS); no-op elsewhere."""
+
+    def send(self, alert):
+        if shutil.which("notify-send"):
+            cmd = ["notify-send", "Futbin alert", alert["message"]]
+        elif sys.platform == "darwin" and shutil.which("osascript"):
+            message = alert["message"].replace('"', "'")
+            cmd = ["osascript", "-e", f'display notification "{message}" with title "Futbin alert"']
+        else:
+            return
+        try:
+            subprocess.run(cmd, check=False, timeout=5)
+        except (OSError, subprocess.SubprocessError):
+            pass
+
+
+SINKS = {"stdout": StdoutSink, "jsonl": JsonlSink, "desktop": DesktopSink}
+
+def make_sink(name):
+    if name not in SINKS:
+        raise ValueError(f"Unknown alert sink {name!r}, expected one of {', '.join(SINKS)}")
+    return SINKS[name]()
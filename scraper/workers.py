@@ -0,0 +1,230 @@
+import asyncio
+import itertools
+import multiprocessing as mp
+import queue
+import time
+from datetime import datetime, timedelta
+from . import metrics
+from .cache_manager import merge_cache, stamp
+from .constants import BROWSER_CONTEXTS, PLAYER_STATS_FILE, SQUAD_CACHE_FILE
+from .scheduler import PageBudget
+
+ROSTER, PLAYER = "roster", "player"
+TAKEN, DONE = "taken", "done"  # worker -> coordinator: job picked off the queue / worker finished
+METRICS = "metrics"  # worker -> coordinator: metrics.diff since the worker's last report
+MERGE_EVERY = 20        # results per cache write
+MERGE_INTERVAL = 2.0    # seconds between cache writes at most
+
+
+# ---------------- worker process ----------------
+def _worker_main(worker_id, jobs, results, concurrency, pages_per_minute, contexts):
+    asyncio.run(_worker(worker_id, jobs, results, concurrency, pages_per_minute, contexts))
+
+async def _worker(worker_id, jobs, results, concurrency, pages_per_minute, contexts):
+    """Own one browser, run `concurrency` pages at a time off the shared job queue.
+
+    Every job taken is reported before it runs, so the coordinator knows
+    which jobs were lost if this process dies.
+    """
+    from playwright.async_api import async_playwright
+    from .contexts import ContextPool
+    from .futbin_scraper import fetch_player_stats, scrape_squad_players
+
+    loop = asyncio.get_running_loop()
+    reported = metrics.snapshot()
+    budget = PageBudget(pages_per_minute)
+    page_slots = asyncio.Semaphore(concurrency)  # extra sales pages share the worker's page slots
+    local = asyncio.Queue(maxsize=1)
+
+    async def pump():
+        # Single reader of the shared queue; takes a job only when a page slot is free
+        while True:
+            job = await loop.run_in_executor(None, jobs.get)
+            if job is None:
+                break
+            results.put((TAKEN, worker_id, job[0], None, None, None))
+            await local.put(job)
+        for _ in range(concurrency):
+            await local.put(None)
+
+    async def consume(context):
+        nonlocal reported
+        while True:
+            job = await local.get()
+            if job is None:
+                return
+            job_id, kind, squad, payload = job
+            await budget.acquire()
+            try:
+                if kind == ROSTER:
+                    result = await scrape_squad_players(context, payload)
+                else:
+                    result = await fetch_player_stats(context, payload, datetime.now() - timedelta(hours=24),
+                                                      page_budget=budget, page_slots=page_slots)
+            except Exception:
+                result = None
+            current = metrics.snapshot()
+            changes, reported = metrics.diff(current, reported), current
+            if changes:
+                results.put((METRICS, worker_id, None, None, None, changes))
+            results.put((kind, worker_id, job_id, squad, payload, result))
+
+    async with async_playwright() as p:
+        browser = await p.firefox.launch(headless=True)
+        context = await ContextPool.create(browser, contexts)
+        await asyncio.gather(pump(), *(consume(context) for _ in range(concurrency)))
+        await browser.close()
+    results.put((DONE, worker_id, None, None, None, None))
+
+
+# ---------------- coordinator ----------------
+class ShardedScan:
+    """Fan (squad, player) jobs out to `workers` processes, each with its own browser.
+
+    Workers pull from one multiprocessing queue, so a slow shard never holds
+    up the others. Results stream back to this process, the only cache
+    writer, which merges them in batches. Squads without a cached roster are
+    queued as roster jobs first and their players are queued as they arrive.
+    The page budget is split evenly between workers. When a worker dies
+    (browser crash, OOM kill) the results it sent are still read, the jobs
+    it had taken without reporting are counted as failed, and the scan
+    finishes on the remaining workers. Workers' counters and histograms are
+    added to this process's metrics (see metrics.diff), so --metrics-port
+    covers the whole scan.
+    """
+
+    def __init__(self, workers=4, concurrency=4, pages_per_minute=120, on_result=None, contexts=BROWSER_CONTEXTS,
+                 target=None, stats_file=PLAYER_STATS_FILE):
+        self.workers = workers
+        self.target = target or _worker_main  # worker process body; stress.py swaps in one that crashes
+        self.stats_file = stats_file
+        self.concurrency = concurrency
+        self.contexts = contexts
+        self.pages_per_minute = pages_per_minute
+        self.on_result = on_result  # called with (squad, player result) in this process
+        self.stats = {"fetched": 0, "failed": 0, "rosters": 0}
+
+    def run(self, squads, player_filter=None):
+        """Scan `squads` ({name: squad info}); `player_filter(squad, pinfo)` picks which players to fetch."""
+        ctx = mp.get_context("spawn")
+        jobs, results = ctx.Queue(), ctx.Queue()
+        share = max(1, self.pages_per_minute // self.workers)
+        procs = [
+            ctx.Process(target=self.target, args=(i, jobs, results, self.concurrency, share, self.contexts),
+                        daemon=True)
+            for i in range(self.workers)
+        ]
+        for proc in procs:
+            proc.start()
+
+        outstanding, job_ids = 0, itertools.count()
+        def enqueue(kind, squad, payload):
+            nonlocal outstanding
+            jobs.put((next(job_ids), kind, squad, payload))
+            outstanding += 1
+
+        def enqueue_players(squad, roster):
+            for pinfo in roster:
+                if player_filter is None or player_filter(squad, pinfo):
+                    enqueue(PLAYER, squad, pinfo)
+
+        for squad, info in squads.items():
+            if info.get("players"):
+                enqueue_players(squad, info["players"])
+            else:
+                enqueue(ROSTER, squad, info["url"])
+
+        pending, last_merge = {}, time.monotonic()
+        taken = {i: set() for i in range(len(procs))}  # worker -> ids of jobs taken but not reported
+        ended = set()
+
+        def handle(message):
+            nonlocal outstanding
+            kind, worker, job_id, squad, payload, result = message
+            if kind == METRICS:
+                metrics.add(result)
+                return
+            jobs_taken = taken.get(worker)
+            if jobs_taken is None:
+                return  # reaped: its unreported jobs were already counted as failed
+            if kind == TAKEN:
+                jobs_taken.add(job_id)
+                return
+            if kind == DONE:
+                ended.add(worker)
+                return
+            jobs_taken.discard(job_id)
+            outstanding -= 1
+            if kind == ROSTER:
+                if result:
+                    self.stats["rosters"] += 1
+                    info = stamp({**squads[squad], "players": result,
+                                  "roster_checked": datetime.now().isoformat(timespec="seconds")})
+                    merge_cache(SQUAD_CACHE_FILE, {squad: info})
+                    enqueue_players(squad, result)
+            elif result:
+                self.stats["fetched"] += 1
+                pending.setdefault(squad, []).append(result)
+                if self.on_result:
+                    self.on_result(squad, result)
+            else:
+                self.stats["failed"] += 1
+
+        stopped = outstanding == 0
+        if stopped:
+            for _ in procs:
+                jobs.put(None)
+        while len(ended) < len(procs):
+            try:
+                handle(results.get(timeout=1.0))
+                idle = False
+            except queue.Empty:
+                idle = True
+            if any(worker not in ended and proc.exitcode not in (None, 0) for worker, proc in enumerate(procs)):
+                # Results a dead worker sent before exiting count; only what never arrived is lost
+                self._drain(results, handle)
+                outstanding -= self._reap(procs, taken, ended)
+            if idle and not any(proc.is_alive() for proc in procs):
+                break  # workers exited without reporting
+            if idle and outstanding and len(taken) < len(procs) and not any(taken.values()):
+                # No live worker holds a job and none was taken for a second: the rest
+                # went down with a worker whose TAKEN never arrived
+                print(f"⚠️ {outstanding} job(s) lost with a dead worker counted as failed.")
+                self.stats["failed"] += outstanding
+                outstanding = 0
+
+            batch = sum(len(v) for v in pending.values())
+            if pending and (batch >= MERGE_EVERY or outstanding == 0 or time.monotonic() - last_merge > MERGE_INTERVAL):
+                merge_cache(self.stats_file, pending)
+                pending, last_merge = {}, time.monotonic()
+            if outstanding == 0 and not stopped:
+                stopped = True
+                for _ in procs:
+                    jobs.put(None)
+
+        if pending:
+            merge_cache(self.stats_file, pending)
+        for proc in procs:
+            proc.join(timeout=30)
+        return self.stats
+
+    @staticmethod
+    def _drain(results, handle):
+        while True:
+            try:
+                handle(results.get(timeout=0.1))
+            except queue.Empty:
+                return
+
+    def _reap(self, procs, taken, ended):
+        """Count the jobs of workers that exited without finishing as failed; returns how many."""
+        lost = 0
+        for worker, proc in enumerate(procs):
+            if worker in ended or proc.exitcode in (None, 0):
+                continue
+            ended.add(worker)
+            jobs = taken.pop(worker)
+            self.stats["failed"] += len(jobs)
+            lost += len(jobs)
+            print(f"⚠️ Worker {worker} exited with code {proc.exitcode}; {len(jobs)} of its job(s) counted as failed.")
+        return lost